@@ -0,0 +1,167 @@
+"""
+聚合K线缓存基准测试：对比BarData列表缓存（旧版逐条修改__dict__生成字典）与BarColumns列式缓存的内存占用及写入耗时。
+
+写入耗时分为三部分：缓存（事件线程中追加到缓存）、转换（写入线程中时区转换并生成插入数据）
+及临时SQLite文件插入。两种方式的时区转换都在转换阶段。
+
+运行方式：python benchmarks/bench_bar_columns.py [--bars 20000]
+"""
+import gc
+import os
+import tracemalloc
+from argparse import ArgumentParser
+from datetime import datetime, timedelta
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, List
+from zoneinfo import ZoneInfo
+
+from peewee import SqliteDatabase, chunked
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import convert_tz
+from vnpy.trader.object import BarData
+
+from vnpy_riskmanager.recorder_engine import AGG_BAR_INSERT_FIELDS, AggregatedBarData, BarColumns
+
+
+def generate_bars(count: int) -> List[BarData]:
+    """"""
+    start: datetime = datetime(2024, 1, 1, 9, tzinfo=ZoneInfo("Asia/Shanghai"))
+    return [
+        BarData(
+            symbol="rb888",
+            exchange=Exchange.SHFE,
+            interval=Interval.MINUTE,
+            datetime=start + timedelta(minutes=i),
+            volume=i,
+            turnover=i * 10.0,
+            open_interest=1000.0,
+            open_price=3500.0 + i,
+            high_price=3510.0 + i,
+            low_price=3490.0 + i,
+            close_price=3505.0 + i,
+            gateway_name="CTP"
+        )
+        for i in range(count)
+    ]
+
+
+def buffer_list(bars: List[BarData]) -> List[BarData]:
+    """旧版缓存：保存BarData列表"""
+    buffer: List[BarData] = []
+    for bar in bars:
+        buffer.append(bar)
+    return buffer
+
+
+def buffer_columns(bars: List[BarData]) -> BarColumns:
+    """列式缓存"""
+    bar: BarData = bars[0]
+    buffer: BarColumns = BarColumns(bar.symbol, bar.exchange, bar.interval, bar.gateway_name)
+    for bar in bars:
+        buffer.append(bar)
+    return buffer
+
+
+def convert_list(buffer: List[BarData]) -> list:
+    """旧版转换：逐条修改__dict__生成字典"""
+    rows: list = []
+    for bar in buffer:
+        bar_datetime = convert_tz(bar.datetime)
+
+        d = bar.__dict__
+        d["exchange"] = d["exchange"].value
+        d["interval"] = d["interval"].value
+        d["datetime"] = bar_datetime
+
+        d.pop("gateway_name", None)
+        d.pop("vt_symbol", None)
+        d.pop("open_interest_value", None)
+        d.pop("extra", None)
+
+        rows.append(d)
+    return rows
+
+
+def convert_columns(buffer: BarColumns) -> list:
+    """"""
+    return buffer.get_rows()
+
+
+def insert_dicts(rows: list) -> None:
+    """"""
+    for c in chunked(rows, 50):
+        AggregatedBarData.insert_many(c).on_conflict_replace().execute()
+
+
+def insert_tuples(rows: list) -> None:
+    """"""
+    for c in chunked(rows, 50):
+        AggregatedBarData.insert_many(c, fields=AGG_BAR_INSERT_FIELDS).on_conflict_replace().execute()
+
+
+def run(
+    name: str,
+    buffer_func: Callable,
+    convert_func: Callable,
+    insert_func: Callable,
+    count: int,
+    folder: str
+) -> None:
+    """"""
+    # 缓存持有的内存：在测量范围内创建K线，缓存完成后只剩缓存引用的对象（旧版为BarData，列式缓存为各列及K线时间）
+    tracemalloc.start()
+    buffer = buffer_func(generate_bars(count))
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del buffer
+
+    # 缓存及转换分别计时（不开启tracemalloc，与timeit一致关闭垃圾回收，避免生成测试数据触发的回收计入耗时）
+    bars: List[BarData] = generate_bars(count)
+    gc.disable()
+
+    start: float = perf_counter()
+    buffer = buffer_func(bars)
+    buffer_time: float = perf_counter() - start
+
+    start = perf_counter()
+    rows: list = convert_func(buffer)
+    convert_time: float = perf_counter() - start
+
+    gc.enable()
+
+    db: SqliteDatabase = SqliteDatabase(os.path.join(folder, f"{name}.db"))
+    with db.bind_ctx([AggregatedBarData]):
+        db.create_tables([AggregatedBarData])
+
+        start = perf_counter()
+        with db.atomic():
+            insert_func(rows)
+        insert_time: float = perf_counter() - start
+
+        written: int = AggregatedBarData.select().count()
+        if written != count:
+            raise RuntimeError(f"{name}写入{written}条，应为{count}条")
+    db.close()
+
+    print(
+        f"{name:<10}{memory / count:>14.0f}{buffer_time * 1000:>14.1f}{convert_time * 1000:>14.1f}"
+        f"{insert_time * 1000:>14.1f}{count / (buffer_time + convert_time + insert_time):>14.0f}"
+    )
+
+
+def main() -> None:
+    """"""
+    parser: ArgumentParser = ArgumentParser(description="聚合K线缓存基准测试")
+    parser.add_argument("--bars", type=int, default=20_000, help="K线数量")
+    args = parser.parse_args()
+
+    print(f"{'方式':<10}{'字节/条':>14}{'缓存(ms)':>14}{'转换(ms)':>14}{'插入(ms)':>14}{'rows/s':>14}")
+    with TemporaryDirectory() as folder:
+        run("list", buffer_list, convert_list, insert_dicts, args.bars, folder)
+        run("columns", buffer_columns, convert_columns, insert_tuples, args.bars, folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+委托流控基准测试：滑动窗口与令牌桶模式下，单次检查+记录耗时不随流控上限增长。
+
+运行方式：python benchmarks/bench_flow_limiter.py
+"""
+from time import perf_counter
+
+from vnpy_riskmanager.engine import FlowLimiter, SlidingWindowLimiter, TokenBucketLimiter
+
+
+def bench(limiter: FlowLimiter, rounds: int) -> float:
+    """返回单次检查+记录耗时（纳秒）"""
+    start: float = perf_counter()
+    for _ in range(rounds):
+        if limiter.check():
+            limiter.record()
+    end: float = perf_counter()
+    return (end - start) / rounds * 1e9
+
+
+def main() -> None:
+    """"""
+    rounds: int = 200_000
+    window: float = 0.2
+
+    print(f"{'流控上限':>8}{'滑动窗口(ns)':>16}{'令牌桶(ns)':>16}")
+    for limit in (10, 1000, 100_000):
+        window_cost: float = bench(SlidingWindowLimiter(limit, window), rounds)
+        bucket_cost: float = bench(TokenBucketLimiter(limit, window, limit), rounds)
+        print(f"{limit:>8}{window_cost:>16.1f}{bucket_cost:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
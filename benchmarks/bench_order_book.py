@@ -0,0 +1,139 @@
+"""
+活动委托簿基准测试：对比旧版max/min遍历与价格档位堆实现的最优价查询耗时。
+
+运行方式：python benchmarks/bench_order_book.py
+"""
+from random import Random
+from time import perf_counter
+from typing import Dict, List
+
+from vnpy.trader.constant import Direction, Exchange, Status
+from vnpy.trader.object import OrderData
+
+from vnpy_riskmanager.engine import ActiveOrderBook
+
+
+class LegacyActiveOrderBook:
+    """旧版活动委托簿（每次遍历全部价格）"""
+
+    def __init__(self, vt_symbol: str) -> None:
+        """"""
+        self.vt_symbol: str = vt_symbol
+
+        self.bid_prices: Dict[str, float] = {}
+        self.ask_prices: Dict[str, float] = {}
+
+    def update_order(self, order: OrderData) -> None:
+        """"""
+        if order.is_active():
+            if order.direction == Direction.LONG:
+                self.bid_prices[order.vt_orderid] = order.price
+            else:
+                self.ask_prices[order.vt_orderid] = order.price
+        else:
+            if order.vt_orderid in self.bid_prices:
+                self.bid_prices.pop(order.vt_orderid)
+            elif order.vt_orderid in self.ask_prices:
+                self.ask_prices.pop(order.vt_orderid)
+
+    def get_best_bid(self) -> float:
+        """"""
+        if not self.bid_prices:
+            return 0
+        return max(self.bid_prices.values())
+
+    def get_best_ask(self) -> float:
+        """"""
+        if not self.ask_prices:
+            return 0
+        return min(self.ask_prices.values())
+
+
+def make_orders(count: int, seed: int = 0) -> List[OrderData]:
+    """生成买卖各半的挂单"""
+    rng: Random = Random(seed)
+    orders: List[OrderData] = []
+
+    for i in range(count):
+        if i % 2:
+            direction: Direction = Direction.LONG
+            price: float = 3500 - rng.randint(1, 200)
+        else:
+            direction: Direction = Direction.SHORT
+            price: float = 3500 + rng.randint(1, 200)
+
+        order: OrderData = OrderData(
+            symbol="rb2410",
+            exchange=Exchange.SHFE,
+            orderid=str(i),
+            direction=direction,
+            price=price,
+            volume=1,
+            status=Status.NOTTRADED,
+            gateway_name="BENCH"
+        )
+        orders.append(order)
+
+    return orders
+
+
+def bench_query(book_class: type, orders: List[OrderData], rounds: int) -> float:
+    """测试最优价查询耗时（纳秒/次）"""
+    book = book_class("rb2410.SHFE")
+    for order in orders:
+        book.update_order(order)
+
+    start: float = perf_counter()
+    for _ in range(rounds):
+        book.get_best_bid()
+        book.get_best_ask()
+    end: float = perf_counter()
+
+    return (end - start) / (rounds * 2) * 1e9
+
+
+def bench_update(book_class: type, orders: List[OrderData]) -> float:
+    """测试挂单加入并撤销的耗时（纳秒/次）"""
+    book = book_class("rb2410.SHFE")
+
+    cancelled: List[OrderData] = []
+    for order in orders:
+        cancelled.append(OrderData(
+            symbol=order.symbol,
+            exchange=order.exchange,
+            orderid=order.orderid,
+            direction=order.direction,
+            price=order.price,
+            volume=order.volume,
+            status=Status.CANCELLED,
+            gateway_name=order.gateway_name
+        ))
+
+    start: float = perf_counter()
+    for order in orders:
+        book.update_order(order)
+    for order in cancelled:
+        book.update_order(order)
+    end: float = perf_counter()
+
+    return (end - start) / (len(orders) * 2) * 1e9
+
+
+def main() -> None:
+    """"""
+    rounds: int = 100_000
+
+    print(f"{'挂单数':>8}{'旧版查询(ns)':>16}{'新版查询(ns)':>16}{'旧版更新(ns)':>16}{'新版更新(ns)':>16}")
+    for count in (10, 100, 1000):
+        orders: List[OrderData] = make_orders(count)
+
+        legacy_query: float = bench_query(LegacyActiveOrderBook, orders, rounds)
+        new_query: float = bench_query(ActiveOrderBook, orders, rounds)
+        legacy_update: float = bench_update(LegacyActiveOrderBook, orders)
+        new_update: float = bench_update(ActiveOrderBook, orders)
+
+        print(f"{count:>8}{legacy_query:>16.1f}{new_query:>16.1f}{legacy_update:>16.1f}{new_update:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
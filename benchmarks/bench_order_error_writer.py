@@ -0,0 +1,94 @@
+"""
+委托错误写入基准测试：对比逐条insert（旧版run逻辑）与RecorderEngine.save_order_errors批量写入的SQLite吞吐。
+
+使用临时SQLite文件，不影响vnpy配置的数据库。
+
+运行方式：python benchmarks/bench_order_error_writer.py [--rows 10000]
+"""
+import os
+from argparse import ArgumentParser
+from datetime import datetime, timedelta
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Callable, List
+
+from peewee import SqliteDatabase
+
+from vnpy.trader.constant import Exchange
+
+from vnpy_riskmanager.recorder_engine import OrderError, OrderErrorData, RecorderEngine
+
+
+def generate_errors(count: int) -> List[OrderErrorData]:
+    """"""
+    start: datetime = datetime(2024, 1, 1, 9)
+    return [
+        OrderErrorData(
+            symbol="rb2410",
+            exchange=Exchange.SHFE,
+            error_code=0,
+            error_msg="委托流数量超过限制",
+            orderid=str(i),
+            create_date=start + timedelta(microseconds=i),
+            gateway_name="CTP"
+        )
+        for i in range(count)
+    ]
+
+
+def save_one_by_one(db: SqliteDatabase, errors: List[OrderErrorData]) -> None:
+    """旧版逻辑：每条委托错误单独insert，各自隐式提交"""
+    for error in errors:
+        d = error.__dict__
+        d["exchange"] = d["exchange"].value
+        d.pop("gateway_name", None)
+        d.pop("vt_symbol", None)
+        OrderError.insert(d).on_conflict_replace().execute()
+
+
+def save_batch(db: SqliteDatabase, errors: List[OrderErrorData]) -> None:
+    """新版逻辑：insert_many分批事务写入"""
+    engine: SimpleNamespace = SimpleNamespace(database=SimpleNamespace(db=db))
+    RecorderEngine.save_order_errors(engine, errors)
+
+
+def run(name: str, func: Callable[[SqliteDatabase, List[OrderErrorData]], None], rows: int, folder: str) -> float:
+    """"""
+    db: SqliteDatabase = SqliteDatabase(os.path.join(folder, f"{name}.db"))
+
+    with db.bind_ctx([OrderError]):
+        db.create_tables([OrderError])
+        errors: List[OrderErrorData] = generate_errors(rows)
+
+        start: float = perf_counter()
+        func(db, errors)
+        elapsed: float = perf_counter() - start
+
+        count: int = OrderError.select().count()
+        if count != rows:
+            raise RuntimeError(f"{name}写入{count}条，应为{rows}条")
+
+    db.close()
+
+    speed: float = rows / elapsed
+    print(f"{name:<16}{rows:>10}{elapsed:>12.3f}{speed:>14.0f}")
+    return speed
+
+
+def main() -> None:
+    """"""
+    parser: ArgumentParser = ArgumentParser(description="委托错误SQLite写入基准测试")
+    parser.add_argument("--rows", type=int, default=10_000, help="写入条数")
+    args = parser.parse_args()
+
+    print(f"{'方式':<16}{'条数':>10}{'耗时(s)':>12}{'rows/s':>14}")
+    with TemporaryDirectory() as folder:
+        single: float = run("one_by_one", save_one_by_one, args.rows, folder)
+        batch: float = run("batch", save_batch, args.rows, folder)
+
+    print(f"批量写入提速{batch / single:.1f}倍")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+风控插件调度基准测试：对比旧版getattr按序号调度与预编译检查流水线的单笔委托耗时。
+
+运行方式：python benchmarks/bench_plugin_pipeline.py
+"""
+from time import perf_counter
+from types import MethodType
+from typing import Callable, Tuple
+
+from vnpy.trader.constant import Direction, Exchange, Offset, OrderType
+from vnpy.trader.object import OrderRequest
+
+
+def check_risk(self, req: OrderRequest, gateway_name: str) -> bool:
+    """空检查，仅用于衡量调度开销"""
+    return True
+
+
+class Dispatcher:
+    """模拟风控引擎上的两种插件调度方式"""
+
+    def __init__(self, plugin_count: int) -> None:
+        """"""
+        self.plugin_count: int = plugin_count
+
+        # 旧版：插件方法以check_risk_{i}形式挂载在实例上
+        for i in range(1, plugin_count + 1):
+            setattr(self, f"check_risk_{i}", MethodType(check_risk, self))
+
+        # 新版：加载时生成不可变的检查流水线
+        self.check_pipeline: Tuple[Tuple[str, Callable[[OrderRequest, str], bool]], ...] = tuple(
+            (f"Plugin{i}", MethodType(check_risk, self)) for i in range(1, plugin_count + 1)
+        )
+
+    def send_order_legacy(self, req: OrderRequest, gateway_name: str) -> str:
+        """"""
+        if self.plugin_count > 0:
+            for i in range(1, self.plugin_count + 1):
+                result: bool = getattr(self, f'check_risk_{i}')(req, gateway_name)
+                if not result:
+                    return ""
+        return "BENCH.1"
+
+    def send_order(self, req: OrderRequest, gateway_name: str) -> str:
+        """"""
+        for name, check in self.check_pipeline:
+            if not check(req, gateway_name):
+                return ""
+        return "BENCH.1"
+
+
+def bench(func: Callable[[OrderRequest, str], str], req: OrderRequest, rounds: int) -> float:
+    """返回单笔委托调度耗时（纳秒）"""
+    start: float = perf_counter()
+    for _ in range(rounds):
+        func(req, "BENCH")
+    end: float = perf_counter()
+    return (end - start) / rounds * 1e9
+
+
+def main() -> None:
+    """"""
+    rounds: int = 200_000
+    req: OrderRequest = OrderRequest(
+        symbol="rb2410",
+        exchange=Exchange.SHFE,
+        direction=Direction.LONG,
+        type=OrderType.LIMIT,
+        volume=1,
+        price=3500,
+        offset=Offset.OPEN
+    )
+
+    print(f"{'插件数':>8}{'旧版(ns)':>12}{'新版(ns)':>12}{'节省(ns)':>12}")
+    for plugin_count in (1, 5, 20):
+        dispatcher: Dispatcher = Dispatcher(plugin_count)
+        legacy: float = bench(dispatcher.send_order_legacy, req, rounds)
+        pipeline: float = bench(dispatcher.send_order, req, rounds)
+        print(f"{plugin_count:>8}{legacy:>12.1f}{pipeline:>12.1f}{legacy - pipeline:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
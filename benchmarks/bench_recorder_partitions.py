@@ -0,0 +1,199 @@
+"""
+RecorderEngine分区写入基准测试：在临时SQLite文件（WAL模式）上对比不同写入线程数下，
+一个写入缓慢的代码（每批写入前等待--slow-delay秒）对其他代码写入完成时间的影响。
+
+SQLite同一时间只允许一个写入，增加写入线程不会提高总吞吐；分区的作用是缓慢的代码只阻塞同一分区的代码。
+
+使用临时数据库文件及溢出文件，不影响vnpy配置的数据库。
+
+运行方式：python benchmarks/bench_recorder_partitions.py [--symbols 32] [--bars 500] [--writers 1,2,4,8] [--slow-delay 0.2]
+"""
+import os
+from argparse import ArgumentParser
+from math import ceil
+from datetime import datetime, timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+from peewee import SqliteDatabase
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+
+from vnpy_riskmanager.recorder_engine import (
+    AggregatedBarData,
+    AggregatedBarOverview,
+    OrderError,
+    OrderErrorData,
+    RecorderEngine,
+    SpillFile
+)
+
+
+MODELS: list = [AggregatedBarData, AggregatedBarOverview, OrderError]
+
+
+class StubEventEngine:
+    """"""
+
+    def register(self, type: str, handler: Callable) -> None:
+        """"""
+        pass
+
+    def put(self, event: object) -> None:
+        """"""
+        pass
+
+
+class StubMainEngine:
+    """"""
+
+    def write_log(self, msg: str, source: str = "") -> None:
+        """不输出引擎日志，避免混入测试结果"""
+        pass
+
+
+class BenchRecorderEngine(RecorderEngine):
+    """创建时不启动写入线程，配置好测试数据库后再启动；记录各代码写入完成的时间"""
+
+    def start(self) -> None:
+        """"""
+        pass
+
+    def launch(self, writer_count: int, db: SqliteDatabase, folder: str, slow_symbol: str, slow_delay: float) -> None:
+        """"""
+        self.writer_count = writer_count
+        self.database = SimpleNamespace(db=db)
+        self.spill = SpillFile(Path(folder).joinpath("spill.jsonl"))
+
+        self.slow_symbol: str = slow_symbol
+        self.slow_delay: float = slow_delay
+        self.finish_times: Dict[str, float] = {}
+
+        RecorderEngine.start(self)
+
+    def save_task(self, task_type: str, items: list) -> None:
+        """"""
+        if task_type != "agg_bar":
+            super().save_task(task_type, items)
+            return
+
+        symbol: str = items[0].symbol
+        if symbol == self.slow_symbol:
+            sleep(self.slow_delay)
+
+        super().save_task(task_type, items)
+        self.finish_times[symbol] = perf_counter()
+
+
+def generate_bars(symbols: int, count: int) -> Dict[str, List[BarData]]:
+    """"""
+    start: datetime = datetime(2024, 1, 1, 9)
+    data: Dict[str, List[BarData]] = {}
+
+    for i in range(symbols):
+        symbol: str = f"s{i}888"
+        data[symbol] = [
+            BarData(
+                symbol=symbol,
+                exchange=Exchange.SHFE,
+                interval=Interval.MINUTE,
+                datetime=start + timedelta(minutes=n),
+                volume=1,
+                open_price=1,
+                high_price=1,
+                low_price=1,
+                close_price=1,
+                gateway_name="CTP"
+            )
+            for n in range(count)
+        ]
+
+    return data
+
+
+def generate_errors(count: int) -> List[OrderErrorData]:
+    """"""
+    start: datetime = datetime(2024, 1, 1, 9)
+    return [
+        OrderErrorData(
+            symbol="rb2410",
+            exchange=Exchange.SHFE,
+            error_code=0,
+            error_msg="委托流数量超过限制",
+            orderid=str(i),
+            create_date=start + timedelta(microseconds=i),
+            gateway_name="CTP"
+        )
+        for i in range(count)
+    ]
+
+
+def run(writer_count: int, symbols: int, count: int, batch: int, slow_delay: float, folder: str) -> float:
+    """返回除缓慢代码以外的全部代码写入完成的耗时"""
+    db: SqliteDatabase = SqliteDatabase(
+        os.path.join(folder, f"writers_{writer_count}_{slow_delay}.db"),
+        pragmas={"journal_mode": "wal"},
+        timeout=30
+    )
+
+    with db.bind_ctx(MODELS):
+        db.create_tables(MODELS)
+
+        data: Dict[str, List[BarData]] = generate_bars(symbols, count)
+        slow_symbol: str = next(iter(data))
+
+        engine: BenchRecorderEngine = BenchRecorderEngine(StubMainEngine(), StubEventEngine())
+        engine.launch(writer_count, db, folder, slow_symbol, slow_delay)
+
+        errors: List[OrderErrorData] = generate_errors(symbols * count // 10)
+        total: int = symbols * count + len(errors)
+
+        start: float = perf_counter()
+
+        # 按批放入，模拟定时写入的多轮数据
+        for i in range(0, count, batch):
+            for bars in data.values():
+                engine.put_task("agg_bar", bars[i:i + batch])
+        engine.put_task("order_error", errors)
+
+        while engine.written_count < total:
+            sleep(0.001)
+
+        engine.close()
+
+        written: int = AggregatedBarData.select().count() + OrderError.select().count()
+        if written != total:
+            raise RuntimeError(f"写入{written}条，应为{total}条")
+
+    db.close()
+
+    return max(t for symbol, t in engine.finish_times.items() if symbol != slow_symbol) - start
+
+
+def main() -> None:
+    """"""
+    parser: ArgumentParser = ArgumentParser(description="RecorderEngine分区写入基准测试")
+    parser.add_argument("--symbols", type=int, default=32, help="代码数量")
+    parser.add_argument("--bars", type=int, default=500, help="每个代码的K线数量")
+    parser.add_argument("--batch", type=int, default=100, help="每批K线数量")
+    parser.add_argument("--writers", default="1,2,4,8", help="写入线程数，逗号分隔")
+    parser.add_argument("--slow-delay", type=float, default=0.2, help="缓慢代码每批写入前的等待时间（秒）")
+    args = parser.parse_args()
+
+    total_delay: float = args.slow_delay * ceil(args.bars / args.batch)
+    print(f"缓慢代码累计等待{total_delay:.3f}秒，以下为其他代码全部写入完成的耗时")
+    print(f"{'线程数':>8}{'无缓慢代码(s)':>16}{'有缓慢代码(s)':>16}{'增加(s)':>12}")
+
+    with TemporaryDirectory() as folder:
+        for writer_count in [int(n) for n in args.writers.split(",")]:
+            base: float = run(writer_count, args.symbols, args.bars, args.batch, 0, folder)
+            slow: float = run(writer_count, args.symbols, args.bars, args.batch, args.slow_delay, folder)
+            print(f"{writer_count:>8}{base:>16.3f}{slow:>16.3f}{slow - base:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,451 @@
+"""
+事前风控基准测试：基于桩对象（无接口、无数据库）测试RiskEngine.send_order的吞吐与延时。
+
+覆盖场景：
+1. 全部通过的委托（风控停止/启动）
+2. 各类内置规则拦截
+3. 活动委托簿中0~1000笔挂单
+4. 分别启用品种敞口、组合名义价值及组合VaR检查
+5. 分别启用各个随包提供的风控插件
+
+运行方式：python benchmarks/bench_risk_gate.py [--rounds 20000] [--output bench_risk_gate.json]
+"""
+import json
+from argparse import ArgumentParser
+from dataclasses import dataclass, field
+from datetime import datetime
+from time import perf_counter_ns
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from vnpy.event import Event
+from vnpy.trader.constant import Direction, Exchange, Offset, OrderType, Product, Status
+from vnpy.trader.event import EVENT_ORDER
+from vnpy.trader.object import AccountData, ContractData, OrderData, OrderRequest, PositionData
+
+from vnpy_riskmanager.engine import RiskEngine
+
+
+GATEWAY_NAME: str = "CTP"
+SYMBOL: str = "rb2410"
+EXCHANGE: Exchange = Exchange.SHFE
+VT_SYMBOL: str = f"{SYMBOL}.{EXCHANGE.value}"
+PRODUCT: str = "RB"
+PRICE: float = 3500
+
+
+class StubEventEngine:
+    """事件引擎桩对象，只记录事件数量，不启动线程"""
+
+    def __init__(self) -> None:
+        """"""
+        self.handlers: Dict[str, List[Callable]] = {}
+        self.event_count: int = 0
+
+    def register(self, type: str, handler: Callable) -> None:
+        """"""
+        self.handlers.setdefault(type, []).append(handler)
+
+    def unregister(self, type: str, handler: Callable) -> None:
+        """"""
+        handlers: List[Callable] = self.handlers.get(type, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def put(self, event: Event) -> None:
+        """"""
+        self.event_count += 1
+
+    def process(self, event: Event) -> None:
+        """同步分发事件，用于准备测试数据"""
+        for handler in self.handlers.get(event.type, []):
+            handler(event)
+
+
+class StubMainEngine:
+    """主引擎桩对象，提供风控引擎及插件用到的查询接口"""
+
+    def __init__(self) -> None:
+        """"""
+        self.order_count: int = 0
+
+        # 已启动的功能引擎，风控引擎从中查找数据记录引擎
+        self.engines: Dict[str, Any] = {}
+
+        self.gateway: SimpleNamespace = SimpleNamespace(td_api=SimpleNamespace(userid="000001"))
+
+        self.account: AccountData = AccountData(
+            accountid="000001",
+            balance=10_000_000,
+            gateway_name=GATEWAY_NAME
+        )
+
+        self.contract: ContractData = ContractData(
+            symbol=SYMBOL,
+            exchange=EXCHANGE,
+            name=SYMBOL,
+            product=Product.FUTURES,
+            size=10,
+            pricetick=1,
+            gateway_name=GATEWAY_NAME
+        )
+
+        self.positions: List[PositionData] = []
+
+    def send_order(self, req: OrderRequest, gateway_name: str) -> str:
+        """"""
+        self.order_count += 1
+        return f"{gateway_name}.{self.order_count}"
+
+    def get_gateway(self, gateway_name: str) -> Optional[SimpleNamespace]:
+        """"""
+        if gateway_name == GATEWAY_NAME:
+            return self.gateway
+        return None
+
+    def get_account(self, vt_accountid: str) -> Optional[AccountData]:
+        """"""
+        if vt_accountid == self.account.vt_accountid:
+            return self.account
+        return None
+
+    def get_all_accounts(self) -> List[AccountData]:
+        """"""
+        return [self.account]
+
+    def get_contract(self, vt_symbol: str) -> Optional[ContractData]:
+        """"""
+        if vt_symbol == self.contract.vt_symbol:
+            return self.contract
+        return None
+
+    def get_all_contracts(self) -> List[ContractData]:
+        """"""
+        return [self.contract]
+
+    def get_all_positions(self) -> List[PositionData]:
+        """"""
+        return self.positions
+
+    def get_all_active_orders(self, vt_symbol: str = "") -> List[OrderData]:
+        """"""
+        return []
+
+    def write_log(self, msg: str, source: str = "") -> None:
+        """"""
+        pass
+
+
+@dataclass
+class Scenario:
+    """测试场景"""
+
+    name: str
+    req: OrderRequest
+    setup: Optional[Callable[[RiskEngine], None]] = None
+    plugins: List[type] = field(default_factory=list)
+    active: bool = True
+    expect_pass: bool = True
+
+
+def make_request(
+    direction: Direction = Direction.LONG,
+    volume: float = 1,
+    price: float = PRICE
+) -> OrderRequest:
+    """"""
+    return OrderRequest(
+        symbol=SYMBOL,
+        exchange=EXCHANGE,
+        direction=direction,
+        type=OrderType.LIMIT,
+        volume=volume,
+        price=price,
+        offset=Offset.OPEN
+    )
+
+
+def create_engine(scenario: Scenario) -> RiskEngine:
+    """创建风控引擎，只启用场景指定的插件"""
+    main_engine: StubMainEngine = StubMainEngine()
+    event_engine: StubEventEngine = StubEventEngine()
+    engine: RiskEngine = RiskEngine(main_engine, event_engine)
+
+    setting: dict = engine.get_setting()
+    setting.update({
+        "active": scenario.active,
+        "order_flow_mode": "counter",
+        "order_flow_limit": 1_000_000_000,
+        "trade_limit": 1_000_000_000,
+        "active_order_limit": 1_000_000_000,
+        "order_cancel_limit": 1_000_000_000,
+        "latency_profile": False,
+    })
+    engine.update_setting(setting)
+
+    for name in list(engine.plugins):
+        engine.disable_plugin(name)
+
+    for plugin_class in scenario.plugins:
+        engine.add_plugin(plugin_class)
+        plugin = engine.plugins[plugin_class.__name__]
+        if plugin.init_plugin:
+            plugin.init_plugin()
+        engine.enable_plugin(plugin_class.__name__)
+    engine.build_check_pipeline()
+
+    if scenario.setup:
+        scenario.setup(engine)
+
+    return engine
+
+
+def add_resting_orders(count: int) -> Callable[[RiskEngine], None]:
+    """在委托价两侧挂count笔不会触发自成交的委托"""
+    def setup(engine: RiskEngine) -> None:
+        for i in range(count):
+            if i % 2:
+                direction: Direction = Direction.LONG
+                price: float = PRICE - 1 - i % 200
+            else:
+                direction: Direction = Direction.SHORT
+                price: float = PRICE + 1 + i % 200
+
+            order: OrderData = OrderData(
+                symbol=SYMBOL,
+                exchange=EXCHANGE,
+                orderid=f"rest{i}",
+                direction=direction,
+                price=price,
+                volume=1,
+                status=Status.NOTTRADED,
+                gateway_name=GATEWAY_NAME
+            )
+            engine.event_engine.process(Event(EVENT_ORDER, order))
+
+    return setup
+
+
+def set_attribute(name: str, value: object) -> Callable[[RiskEngine], None]:
+    """"""
+    def setup(engine: RiskEngine) -> None:
+        setattr(engine, name, value)
+    return setup
+
+
+def set_cancel_count(engine: RiskEngine) -> None:
+    """"""
+    engine.order_cancel_counts[VT_SYMBOL] = engine.order_cancel_limit
+
+
+def init_symbol_intraday_max_open(engine: RiskEngine) -> None:
+    """"""
+    engine.symbol_max_open = {"RB": 1_000_000}
+    engine.contract_max_open = {SYMBOL.upper(): 1_000_000}
+
+
+def init_symbol_restriction(engine: RiskEngine) -> None:
+    """"""
+    engine.restrict_by_white_list = True
+    engine.restriction_list = [SYMBOL]
+
+
+def update_setting(**kwargs) -> Callable[[RiskEngine], None]:
+    """按配置项更新风控参数"""
+    def setup(engine: RiskEngine) -> None:
+        setting: dict = engine.get_setting()
+        setting.update(kwargs)
+        engine.update_setting(setting)
+    return setup
+
+
+def init_var(var_limit: float, count: int = 50) -> Callable[[RiskEngine], None]:
+    """设置count个品种的随机协方差矩阵（包含RB），跳过数据库估计"""
+    def setup(engine: RiskEngine) -> None:
+        update_setting(var_limit=var_limit)(engine)
+
+        products: List[str] = [PRODUCT] + [f"P{i}" for i in range(1, count)]
+        returns: np.ndarray = np.random.default_rng(0).normal(0, 0.01, (1000, count))
+        cov: np.ndarray = np.cov(returns, rowvar=False)
+        engine.var_model.set_covariance(products, cov, engine.exposure_engine.exposures)
+    return setup
+
+
+def get_exposure_scenarios() -> List[Scenario]:
+    """品种敞口、组合名义价值及组合VaR检查（委托名义价值35000，账户资金1000万）"""
+    groups: Dict[str, List[str]] = {"黑色": [PRODUCT, "HC", "I", "J", "JM"]}
+
+    return [
+        Scenario("exposure_pass", make_request(), update_setting(exposure_limit=0.5)),
+        Scenario("exposure_reject", make_request(), update_setting(exposure_limit=0.001), expect_pass=False),
+        Scenario(
+            "portfolio_pass",
+            make_request(),
+            update_setting(
+                portfolio_gross_limit=1_000_000,
+                portfolio_net_limit=1_000_000,
+                product_groups=groups,
+                group_limits={"黑色": {"gross": 1_000_000, "net": 1_000_000}}
+            )
+        ),
+        Scenario(
+            "portfolio_reject",
+            make_request(),
+            update_setting(
+                product_groups=groups,
+                group_limits={"黑色": {"gross": 10_000, "net": 10_000}}
+            ),
+            expect_pass=False
+        ),
+        Scenario("var_pass", make_request(), init_var(1_000_000)),
+        Scenario("var_reject", make_request(), init_var(1), expect_pass=False),
+    ]
+
+
+def get_plugin_scenarios() -> List[Scenario]:
+    """加载随包提供的风控插件，缺少依赖的插件跳过"""
+    scenarios: List[Scenario] = []
+
+    from vnpy_riskmanager.plugin.symbol_intraday_max_open import SymbolIntradayMaxOpen
+    scenarios.append(Scenario(
+        "plugin_symbol_intraday_max_open",
+        make_request(),
+        init_symbol_intraday_max_open,
+        [SymbolIntradayMaxOpen]
+    ))
+
+    from vnpy_riskmanager.plugin.ignore.order_value_limit import OrderValueLimit
+    scenarios.append(Scenario("plugin_order_value_limit", make_request(), None, [OrderValueLimit]))
+
+    from vnpy_riskmanager.plugin.ignore.symbol_restriction import SymbolRestriction
+    scenarios.append(Scenario(
+        "plugin_symbol_restriction",
+        make_request(),
+        init_symbol_restriction,
+        [SymbolRestriction]
+    ))
+
+    try:
+        from vnpy_riskmanager.plugin.ignore.symbol_frozen import SymbolFrozen
+        scenarios.append(Scenario("plugin_symbol_frozen", make_request(), None, [SymbolFrozen]))
+    except ImportError as e:
+        print(f"跳过SymbolFrozen插件：{e}")
+
+    return scenarios
+
+
+def get_scenarios() -> List[Scenario]:
+    """"""
+    scenarios: List[Scenario] = [
+        Scenario("pass_inactive", make_request(), active=False),
+        Scenario("pass_active", make_request()),
+
+        Scenario("reject_volume_zero", make_request(volume=0), expect_pass=False),
+        Scenario("reject_order_size", make_request(volume=1_000_000), expect_pass=False),
+        Scenario(
+            "reject_trade_limit",
+            make_request(),
+            set_attribute("trade_count", 1_000_000_000),
+            expect_pass=False
+        ),
+        Scenario(
+            "reject_order_flow",
+            make_request(),
+            set_attribute("order_flow_count", 1_000_000_000),
+            expect_pass=False
+        ),
+        Scenario(
+            "reject_active_order",
+            make_request(),
+            set_attribute("active_order_count", 1_000_000_000),
+            expect_pass=False
+        ),
+        Scenario("reject_order_cancel", make_request(), set_cancel_count, expect_pass=False),
+        Scenario(
+            "reject_self_trade",
+            make_request(price=PRICE + 1),
+            add_resting_orders(1),
+            expect_pass=False
+        ),
+    ]
+
+    for count in (0, 10, 100, 1000):
+        scenarios.append(Scenario(f"resting_orders_{count}", make_request(), add_resting_orders(count)))
+
+    scenarios.extend(get_exposure_scenarios())
+    scenarios.extend(get_plugin_scenarios())
+
+    return scenarios
+
+
+def run_scenario(scenario: Scenario, rounds: int) -> dict:
+    """"""
+    engine: RiskEngine = create_engine(scenario)
+    send_order: Callable[[OrderRequest, str], str] = engine.send_order
+    req: OrderRequest = scenario.req
+
+    # 预热并检查场景结果是否符合预期
+    vt_orderid: str = send_order(req, GATEWAY_NAME)
+    if bool(vt_orderid) != scenario.expect_pass:
+        raise RuntimeError(f"场景{scenario.name}结果不符合预期：{vt_orderid!r}")
+
+    samples: List[int] = [0] * rounds
+
+    start: int = perf_counter_ns()
+    for i in range(rounds):
+        t: int = perf_counter_ns()
+        send_order(req, GATEWAY_NAME)
+        samples[i] = perf_counter_ns() - t
+    elapsed: int = perf_counter_ns() - start
+
+    samples.sort()
+
+    return {
+        "name": scenario.name,
+        "rounds": rounds,
+        "ops_per_sec": rounds / elapsed * 1e9,
+        "p50_ns": samples[int(rounds * 0.5)],
+        "p90_ns": samples[int(rounds * 0.9)],
+        "p99_ns": samples[min(int(rounds * 0.99), rounds - 1)],
+        "max_ns": samples[-1],
+    }
+
+
+def main() -> None:
+    """"""
+    parser: ArgumentParser = ArgumentParser(description="RiskEngine事前风控基准测试")
+    parser.add_argument("--rounds", type=int, default=20_000, help="每个场景的委托笔数")
+    parser.add_argument("--output", default="bench_risk_gate.json", help="测试结果JSON文件路径")
+    parser.add_argument("--filter", default="", help="只运行名称包含该字符串的场景")
+    args = parser.parse_args()
+
+    results: List[dict] = []
+
+    print(f"{'场景':<36}{'ops/s':>12}{'p50(ns)':>10}{'p90(ns)':>10}{'p99(ns)':>10}{'max(ns)':>12}")
+    for scenario in get_scenarios():
+        if args.filter not in scenario.name:
+            continue
+
+        result: dict = run_scenario(scenario, args.rounds)
+        results.append(result)
+
+        print(
+            f"{result['name']:<36}{result['ops_per_sec']:>12.0f}{result['p50_ns']:>10}"
+            f"{result['p90_ns']:>10}{result['p99_ns']:>10}{result['max_ns']:>12}"
+        )
+
+    output: dict = {
+        "datetime": datetime.now().isoformat(),
+        "rounds": args.rounds,
+        "results": results,
+    }
+    with open(args.output, mode="w", encoding="UTF-8") as f:
+        json.dump(output, f, indent=4, ensure_ascii=False)
+
+    print(f"测试结果已保存至{args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+由数据库中的1分钟K线历史离线重建多周期聚合K线（AggregatedBarData），完成后重建汇总数据。
+
+窗口划分与RecorderEngine记录时的增量聚合一致（agg_intervals），已存在的聚合K线将被替换。
+
+运行方式：python examples/backfill_agg_bars.py rb888 SHFE 2024-01-01 2024-06-30 [--intervals 5m,15m,30m,1h,d]
+"""
+from argparse import ArgumentParser
+from datetime import datetime
+from typing import List
+
+from peewee import chunked
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import get_database
+from vnpy.trader.object import BarData
+
+from vnpy_riskmanager.recorder_engine import (
+    AGG_BAR_INSERT_FIELDS,
+    AggregatedBarData,
+    BarColumns,
+    build_agg_columns,
+    reconcile_overview
+)
+
+
+if __name__ == "__main__":
+    parser: ArgumentParser = ArgumentParser(description="重建多周期聚合K线")
+    parser.add_argument("symbol")
+    parser.add_argument("exchange")
+    parser.add_argument("start", type=datetime.fromisoformat)
+    parser.add_argument("end", type=datetime.fromisoformat)
+    parser.add_argument("--intervals", default="5m,15m,30m,1h,d", help="聚合周期，逗号分隔")
+    args = parser.parse_args()
+
+    database = get_database()
+    bars: List[BarData] = database.load_bar_data(args.symbol, Exchange(args.exchange), Interval.MINUTE, args.start, args.end)
+    print(f"载入1分钟K线{len(bars)}条")
+
+    columns_list: List[BarColumns] = build_agg_columns(args.symbol, Exchange(args.exchange), bars, args.intervals.split(","))
+
+    with database.db.atomic():
+        for columns in columns_list:
+            for c in chunked(columns.get_rows(), 50):
+                AggregatedBarData.insert_many(c, fields=AGG_BAR_INSERT_FIELDS).on_conflict_replace().execute()
+            print(f"{columns.interval_value}：{len(columns)}条")
+
+    count: int = reconcile_overview()
+    print(f"聚合K线汇总数据重建完成，共{count}条")
@@ -0,0 +1,11 @@
+"""
+离线重建聚合K线汇总数据（AggregatedBarOverview）。
+
+记录过程中汇总数据按批增量维护，若数据表被外部修改或出现偏差，可停止记录后运行本脚本全表统计重建。
+"""
+from vnpy_riskmanager.recorder_engine import reconcile_overview
+
+
+if __name__ == "__main__":
+    count: int = reconcile_overview()
+    print(f"聚合K线汇总数据重建完成，共{count}条")
@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+
+from vnpy_riskmanager.symbol import SymbolNormalizer
+
+
+def write_main_ticker(tmp_path: Path, main_tickers: dict) -> str:
+    """按main_ticker.json的格式（品种: vt_symbol）写入主力合约表"""
+    path: Path = tmp_path.joinpath("main_ticker.json")
+    with open(path, mode="w", encoding="UTF-8") as f:
+        json.dump(main_tickers, f, indent=4, ensure_ascii=False)
+    return str(path)
+
+
+def test_main_ticker_vt_symbol(tmp_path: Path) -> None:
+    filename: str = write_main_ticker(tmp_path, {"rb": "rb2410.SHFE", "IF": "IF2409.CFFEX"})
+    normalizer: SymbolNormalizer = SymbolNormalizer(main_ticker_file=filename)
+
+    assert normalizer.normalize("rb2410") == "rb888"
+    assert normalizer.normalize("IF2409") == "IF888"
+
+    # 非主力合约及表中没有的品种保持原代码
+    assert normalizer.normalize("rb2501") == "rb2501"
+    assert normalizer.normalize("hc2410") == "hc2410"
+
+
+def test_main_ticker_alias(tmp_path: Path) -> None:
+    filename: str = write_main_ticker(tmp_path, {"rb": "rb2410.SHFE"})
+    normalizer: SymbolNormalizer = SymbolNormalizer(aliases={"rb": "RB99"}, main_ticker_file=filename)
+
+    assert normalizer.normalize("rb2410") == "RB99"
+    assert normalizer.normalize("rb2501") == "rb2501"
+
+
+def test_main_ticker_reload(tmp_path: Path) -> None:
+    filename: str = write_main_ticker(tmp_path, {"rb": "rb2410.SHFE"})
+    normalizer: SymbolNormalizer = SymbolNormalizer(main_ticker_file=filename)
+    assert normalizer.normalize("rb2501") == "rb2501"
+
+    write_main_ticker(tmp_path, {"rb": "rb2501.SHFE"})
+    normalizer.main_ticker_mtime = 0
+    assert normalizer.check_main_tickers()
+
+    assert normalizer.normalize("rb2501") == "rb888"
+    assert normalizer.normalize("rb2410") == "rb2410"
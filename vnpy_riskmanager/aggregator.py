@@ -0,0 +1,231 @@
+from copy import copy
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from vnpy.trader.constant import Interval
+from vnpy.trader.object import BarData
+
+
+# 交易所本地时区，窗口按本地时钟对齐
+CHINA_TZ = ZoneInfo("Asia/Shanghai")
+
+# 晚于该时间的K线属于下一交易日（夜盘）
+NIGHT_START: time = time(18)
+
+# 默认的交易时段结束时间：日盘小节休息、午休、收盘及各品种夜盘收盘
+DEFAULT_SESSION_ENDS: List[str] = ["10:15", "11:30", "15:00", "15:15", "23:00", "01:00", "02:30"]
+DEFAULT_DAILY_CLOSE: str = "15:00"
+
+# 窗口K线的数值字段
+BAR_FIELDS: List[str] = [
+    "volume",
+    "turnover",
+    "open_interest",
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+]
+
+
+def parse_window(label: str) -> Tuple[Interval, int]:
+    """解析窗口标签：如5m、15m、1h、d"""
+    if label == Interval.DAILY.value:
+        return Interval.DAILY, 1
+    if label.endswith("m"):
+        return Interval.MINUTE, int(label[:-1])
+    if label.endswith("h"):
+        return Interval.HOUR, int(label[:-1])
+    raise ValueError(f"不支持的聚合周期：{label}")
+
+
+def parse_time(text: str) -> time:
+    """"""
+    return datetime.strptime(text, "%H:%M").time()
+
+
+def get_trading_day(dt: datetime) -> date:
+    """K线所属交易日：夜盘计入下一交易日，周末顺延（不处理节假日）"""
+    day: date = dt.date()
+    if dt.time() >= NIGHT_START:
+        day += timedelta(days=1)
+
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+class BarWindow:
+    """
+    单个合约、单个周期的增量窗口K线。
+
+    窗口按本地时钟对齐（日线按交易日），每根1分钟K线O(1)更新。
+    窗口结束或到达交易时段结束时输出当前K线的快照；同一窗口后续仍有K线时（如国债期货15:15收盘）
+    继续累计并在之后再次输出，写入时替换之前的快照。
+    """
+
+    def __init__(self, label: str, session_ends: Set[time], daily_close: time) -> None:
+        """"""
+        self.label: str = label
+        self.interval, self.window = parse_window(label)
+
+        self.session_ends: Set[time] = session_ends
+        self.daily_close: time = daily_close
+
+        self.bar: Optional[BarData] = None
+        self.key: Optional[datetime] = None
+        self.closed: bool = False
+
+    def get_bucket(self, dt: datetime) -> Tuple[datetime, datetime]:
+        """返回K线所属窗口的开始及结束时间"""
+        if self.interval == Interval.DAILY:
+            day: date = get_trading_day(dt)
+            return (
+                datetime.combine(day, time(), dt.tzinfo),
+                datetime.combine(day, self.daily_close, dt.tzinfo)
+            )
+
+        if self.interval == Interval.HOUR:
+            minutes: int = self.window * 60
+        else:
+            minutes: int = self.window
+
+        midnight: datetime = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+        offset: int = (dt.hour * 60 + dt.minute) // minutes * minutes
+        start: datetime = midnight + timedelta(minutes=offset)
+        return start, start + timedelta(minutes=minutes)
+
+    def update_bar(self, bar: BarData, dt: datetime) -> List[BarData]:
+        """更新1分钟K线（dt为其本地时间），返回本次完成的窗口K线"""
+        completed: List[BarData] = []
+
+        key, end = self.get_bucket(dt)
+
+        if self.bar and key != self.key:
+            if not self.closed:
+                completed.append(copy(self.bar))
+            self.bar = None
+
+        if not self.bar:
+            self.bar = BarData(
+                symbol=bar.symbol,
+                exchange=bar.exchange,
+                datetime=key,
+                interval=self.interval,
+                gateway_name=bar.gateway_name,
+                volume=bar.volume,
+                turnover=bar.turnover,
+                open_interest=bar.open_interest,
+                open_price=bar.open_price,
+                high_price=bar.high_price,
+                low_price=bar.low_price,
+                close_price=bar.close_price
+            )
+            self.key = key
+        else:
+            window_bar: BarData = self.bar
+            window_bar.high_price = max(window_bar.high_price, bar.high_price)
+            window_bar.low_price = min(window_bar.low_price, bar.low_price)
+            window_bar.close_price = bar.close_price
+            window_bar.volume += bar.volume
+            window_bar.turnover += bar.turnover
+            window_bar.open_interest = bar.open_interest
+
+        # 1分钟K线的时间为开始时间
+        bar_end: datetime = dt + timedelta(minutes=1)
+        if bar_end >= end or (self.interval != Interval.DAILY and bar_end.time() in self.session_ends):
+            completed.append(copy(self.bar))
+            self.closed = True
+        else:
+            self.closed = False
+
+        return completed
+
+
+class BarAggregator:
+    """由1分钟K线增量生成多周期窗口K线，按合约维护各周期窗口"""
+
+    def __init__(
+        self,
+        labels: List[str],
+        session_ends: Optional[List[str]] = None,
+        daily_close: str = DEFAULT_DAILY_CLOSE
+    ) -> None:
+        """"""
+        if session_ends is None:
+            session_ends = DEFAULT_SESSION_ENDS
+
+        self.labels: List[str] = labels
+        self.session_ends: Set[time] = {parse_time(text) for text in session_ends}
+        self.daily_close: time = parse_time(daily_close)
+
+        self.windows: Dict[str, List[BarWindow]] = {}
+
+        for label in labels:
+            parse_window(label)
+
+    def update_bar(self, bar: BarData) -> List[Tuple[str, BarData]]:
+        """更新1分钟K线，返回本次完成的(周期标签, 窗口K线)"""
+        windows: Optional[List[BarWindow]] = self.windows.get(bar.vt_symbol, None)
+        if windows is None:
+            windows = [BarWindow(label, self.session_ends, self.daily_close) for label in self.labels]
+            self.windows[bar.vt_symbol] = windows
+
+        dt: datetime = bar.datetime
+        if dt.tzinfo:
+            dt = dt.astimezone(CHINA_TZ)
+
+        completed: List[Tuple[str, BarData]] = []
+        for window in windows:
+            for window_bar in window.update_bar(bar, dt):
+                completed.append((window.label, window_bar))
+        return completed
+
+
+def aggregate_history(
+    datetimes: np.ndarray,
+    values: Dict[str, np.ndarray],
+    label: str,
+    daily_close: str = DEFAULT_DAILY_CLOSE
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    向量化聚合1分钟K线历史。
+
+    datetimes为按时间排序的本地时间（datetime64[m]，K线开始时间），values为BAR_FIELDS各列。
+    窗口划分与BarWindow一致，返回各窗口的开始时间及聚合后的各列。
+    """
+    interval, window = parse_window(label)
+
+    days: np.ndarray = datetimes.astype("datetime64[D]")
+    minutes: np.ndarray = (datetimes - days).astype(np.int64)
+
+    if interval == Interval.DAILY:
+        night_minute: int = NIGHT_START.hour * 60 + NIGHT_START.minute
+        days = days + (minutes >= night_minute).astype("timedelta64[D]")
+        keys: np.ndarray = np.busday_offset(days, 0, roll="forward").astype("datetime64[m]")
+    else:
+        if interval == Interval.HOUR:
+            size: int = window * 60
+        else:
+            size: int = window
+        keys: np.ndarray = days.astype("datetime64[m]") + (minutes // size * size).astype("timedelta64[m]")
+
+    if not len(keys):
+        return keys, {name: values[name][:0] for name in BAR_FIELDS}
+
+    starts: np.ndarray = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends: np.ndarray = np.r_[starts[1:], len(keys)] - 1
+
+    result: Dict[str, np.ndarray] = {
+        "volume": np.add.reduceat(values["volume"], starts),
+        "turnover": np.add.reduceat(values["turnover"], starts),
+        "open_interest": values["open_interest"][ends],
+        "open_price": values["open_price"][starts],
+        "high_price": np.maximum.reduceat(values["high_price"], starts),
+        "low_price": np.minimum.reduceat(values["low_price"], starts),
+        "close_price": values["close_price"][ends],
+    }
+    return keys[starts], result
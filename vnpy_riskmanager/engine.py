@@ -1,12 +1,17 @@
-from collections import defaultdict
-from typing import Callable, Dict, Optional, List
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from heapq import heappush, heappop, heapify
+from dataclasses import dataclass
+from sys import intern
+from time import monotonic, perf_counter_ns
+from typing import Any, Callable, Deque, Dict, Optional, List, Tuple
 from types import MethodType
 from vnpy.event import Event, EventEngine
 from vnpy.trader.gateway import BaseGateway
-from vnpy.trader.object import OrderData, OrderRequest, LogData, TradeData, PositionData, AccountData
+from vnpy.trader.object import OrderData, OrderRequest, LogData, TradeData, PositionData, AccountData, ContractData
 from vnpy.trader.engine import BaseEngine, MainEngine
-from vnpy.trader.event import EVENT_TRADE, EVENT_ORDER, EVENT_LOG, EVENT_TIMER
-from vnpy.trader.constant import Direction, Status
+from vnpy.trader.event import EVENT_TRADE, EVENT_ORDER, EVENT_LOG, EVENT_TIMER, EVENT_CONTRACT, EVENT_ACCOUNT, EVENT_POSITION
+from vnpy.trader.constant import Direction, Exchange, Interval, Offset, Product, Status
 from vnpy.trader.utility import load_json, save_json
 
 from sqlalchemy import create_engine, text
@@ -14,11 +19,113 @@ from urllib.parse import quote_plus as urlquote
 from datetime import datetime
 
 from vnpy_ctp.gateway.ctp_gateway import CtpTdApi
-from .recorder_engine import OrderErrorData, EVENT_ORDER_ERROR_RECORD
+from .recorder_engine import OrderErrorData, EVENT_ORDER_ERROR_RECORD, RecorderEngine, APP_NAME as RECORDER_APP_NAME
+from .profiler import LatencyProfiler
+from .exposure import ExposureEngine, ProductExposure, is_open
+from .var import VarModel
+from .symbol import SymbolNormalizer
 import json
 
 APP_NAME = "RiskManager"
 
+EVENT_RISK_LATENCY = "eRiskLatency"
+LATENCY_TOTAL = "total"
+
+FLOW_MODE_COUNTER = "counter"
+FLOW_MODE_WINDOW = "window"
+FLOW_MODE_BUCKET = "bucket"
+
+# 账户数据超过account_max_age时get_balance的返回值，与无法获取资金（0）区分
+STALE_BALANCE = float("-inf")
+
+
+def extract_product(symbol: str) -> str:
+    """提取合约代码中的品种前缀（大写）"""
+    symbol = symbol.upper()
+    for i, s in enumerate(symbol):
+        if s.isdigit():
+            return symbol[:i]
+    return symbol
+
+
+@dataclass
+class SymbolInfo:
+    """合约元数据"""
+
+    vt_symbol: str
+    symbol: str
+    exchange: str
+    product: str
+    size: float = 0
+    pricetick: float = 0
+
+    @classmethod
+    def from_vt_symbol(cls, vt_symbol: str) -> "SymbolInfo":
+        """解析本地代码，品种前缀等字符串驻留以节省内存"""
+        symbol, _, exchange = vt_symbol.rpartition(".")
+
+        return cls(
+            vt_symbol=intern(vt_symbol),
+            symbol=intern(symbol),
+            exchange=intern(exchange),
+            product=intern(extract_product(symbol))
+        )
+
+    def update_contract(self, contract: ContractData) -> None:
+        """"""
+        self.size = contract.size
+        self.pricetick = contract.pricetick
+
+
+@dataclass
+class ProductPosition:
+    """品种持仓汇总（成本为持仓数量乘以持仓均价，不含合约乘数）"""
+
+    product: str
+    long_volume: float = 0
+    short_volume: float = 0
+    long_cost: float = 0
+    short_cost: float = 0
+
+    @property
+    def net_volume(self) -> float:
+        """"""
+        return self.long_volume - self.short_volume
+
+    def update(self, position: PositionData, sign: int) -> None:
+        """计入（sign=1）或扣除（sign=-1）一条持仓"""
+        volume: float = position.volume
+
+        if position.direction == Direction.LONG or (position.direction == Direction.NET and volume > 0):
+            self.long_volume += sign * volume
+            self.long_cost += sign * volume * position.price
+        elif position.direction == Direction.SHORT or (position.direction == Direction.NET and volume < 0):
+            volume = abs(volume)
+            self.short_volume += sign * volume
+            self.short_cost += sign * volume * position.price
+
+
+@dataclass
+class RejectStat:
+    """汇总间隔内的拒单统计"""
+
+    req: OrderRequest
+    gateway_name: str
+    msg: str
+    count: int = 0
+
+
+@dataclass
+class RiskPlugin:
+    """风控插件"""
+
+    name: str
+    check_risk: Callable[[OrderRequest, str], bool]
+    init_plugin: Optional[Callable[[], None]] = None
+    check_batch_order: Optional[Callable[[OrderRequest, str, "RiskBatch"], bool]] = None
+    process_trade_event: Optional[Callable[[Event], None]] = None
+    active: bool = True
+
 
 class RiskEngine(BaseEngine):
     """风控引擎"""
@@ -37,6 +144,11 @@ class RiskEngine(BaseEngine):
         self.order_flow_clear: int = 1  # 委托流控清空（秒）
         self.order_flow_timer: int = 0
 
+        self.order_flow_mode: str = FLOW_MODE_COUNTER  # 委托流控模式
+        self.order_flow_window: int = 1000  # 委托流控窗口（毫秒）
+        self.order_flow_burst: int = 0  # 委托流控突发上限（笔），0表示等于流控上限
+        self.flow_limiter: Optional[FlowLimiter] = None
+
         # self.position_timer: int = 0
         # self.position_flash: int = 120# 持仓刷新（秒）
         #
@@ -56,13 +168,14 @@ class RiskEngine(BaseEngine):
         #     echo=False
         # )
 
-        self.plugin_count = 0
-        self.init_plugin_count = 0
+        self.plugins: Dict[str, RiskPlugin] = {}
+        self.check_pipeline: Tuple[Tuple[str, Callable[[OrderRequest, str], bool]], ...] = ()
+        self.batch_pipeline: Tuple[Tuple[str, Callable[..., bool], bool], ...] = ()
         self.load_check_risk_plugin()
-        # 执行init_plugin方法（1、2、...）
-        if self.init_plugin_count > 0:
-            for i in range(1, self.init_plugin_count + 1):
-                getattr(self, f'init_plugin_{i}')()
+        # 按加载顺序执行插件的init_plugin方法
+        for plugin in self.plugins.values():
+            if plugin.init_plugin:
+                plugin.init_plugin()
 
         self.order_size_limit: int = 100  # 单笔委托上限（数量）
 
@@ -74,11 +187,77 @@ class RiskEngine(BaseEngine):
 
         self.active_order_limit: int = 500  # 活动委托上限（笔）
 
+        # 活动委托计数，由委托推送增量维护
+        self.active_orders: Dict[str, OrderData] = {}
+        self.active_order_count: int = 0
+        self.gateway_active_counts: Dict[str, int] = defaultdict(int)
+        self.symbol_active_counts: Dict[str, int] = defaultdict(int)
+
         self.active_order_books: Dict[str, ActiveOrderBook] = {}
 
+        # 账户快照缓存，由账户推送更新
+        self.gateway_accounts: Dict[str, AccountData] = {}
+        self.account_update_times: Dict[str, float] = {}
+        self.vt_accountids: Dict[str, str] = {}
+        self.account_max_age: int = 0  # 账户数据最大允许延迟（秒），0表示不检查
+
+        # 合约元数据缓存，供内置检查及插件共用
+        self.symbol_infos: Dict[str, SymbolInfo] = {}
+
+        # 品种敞口，由持仓、成交、委托推送增量维护
+        self.exposure_engine: ExposureEngine = ExposureEngine(self.get_symbol_info)
+        self.exposure_limit: float = 0  # 品种净敞口占账户资金比例上限，0表示不检查
+        self.product_exposure_limits: Dict[str, float] = {}  # 分品种净敞口比例上限
+
+        # 组合名义价值上限，分组汇总由敞口引擎增量维护
+        self.portfolio_gross_limit: float = 0  # 账户总敞口（多头+空头）上限，0表示不检查
+        self.portfolio_net_limit: float = 0  # 账户净敞口（多头-空头）绝对值上限，0表示不检查
+        self.product_groups: Dict[str, List[str]] = {}  # 品种分组，如{"黑色": ["RB", "HC", "I", "J", "JM"]}
+        self.group_limits: Dict[str, Dict[str, float]] = {}  # 分组上限，如{"黑色": {"gross": 0, "net": 0}}
+
+        # 参数法组合VaR，品种净敞口变化时增量更新
+        self.var_model: VarModel = VarModel()
+        self.exposure_engine.net_callback = self.var_model.update
+        self.var_limit: float = 0  # 组合VaR上限（金额），0表示不检查
+        self.var_confidence: float = 0.99  # VaR置信度
+        self.var_horizon: int = 1  # VaR持有期（K线周期数）
+        self.var_interval: str = Interval.MINUTE.value  # 估计协方差使用的K线周期
+        self.var_days: int = 5  # 估计协方差读取的K线天数
+        self.var_window: int = 1000  # 估计协方差使用的收益率个数
+        self.var_refresh: int = 3600  # 协方差矩阵刷新间隔（秒）
+        self.var_timer: int = self.var_refresh
+
+        # 持仓索引（vt_symbol -> vt_positionid -> 持仓）及品种汇总，由持仓推送更新
+        self.symbol_positions: Dict[str, Dict[str, PositionData]] = {}
+        self.product_positions: Dict[str, ProductPosition] = {}
+
+        # 内置风控检查，按顺序执行
+        self.builtin_checks: Tuple[Tuple[str, Callable[[OrderRequest, str], bool]], ...] = (
+            ("order_volume", self.check_order_volume),
+            ("trade_volume", self.check_trade_volume),
+            ("order_flow", self.check_order_flow),
+            ("active_order", self.check_active_order_limit),
+            ("order_cancel", self.check_order_cancel),
+            ("self_trade", self.check_self_trade),
+            ("exposure", self.check_exposure),
+            ("portfolio", self.check_portfolio),
+            ("var", self.check_var),
+        )
+
+        self.reject_report_interval: int = 5  # 拒单汇总推送间隔（秒），0表示逐笔推送
+        self.reject_report_timer: int = 0
+        self.reject_stats: Dict[Tuple[str, str], RejectStat] = {}
+
+        self.latency_profile: bool = False  # 风控延时统计
+        self.latency_interval: int = 60  # 延时统计推送间隔（秒）
+        self.latency_timer: int = 0
+        self.latency_profiler: Optional[LatencyProfiler] = None
+
         self.load_setting()
         self.register_event()
         self.patch_send_order()
+        self.rebuild_active_orders()
+        self.rebuild_positions()
 
     def patch_send_order(self) -> None:
         """
@@ -89,23 +268,136 @@ class RiskEngine(BaseEngine):
 
     def send_order(self, req: OrderRequest, gateway_name: str) -> str:
         """"""
-        result: bool = self.check_risk(req, gateway_name)
+        if self.latency_profiler:
+            result: bool = self.check_order_profiled(req, gateway_name)
+        else:
+            result: bool = self.check_order(req, gateway_name)
+
         if not result:
             return ""
 
-        # 执行风控插件（1、2、...）
-        if self.plugin_count > 0:
-            for i in range(1, self.plugin_count + 1):
-                result: bool = getattr(self, f'check_risk_{i}')(req, gateway_name)
-                if not result:
-                    self.write_log(f"风控插件{i}拦截此笔委托")
-                    return ""
-                
         # Add flow count if pass all checks
         self.order_flow_count += 1
+        if self.flow_limiter:
+            self.flow_limiter.record()
 
         return self._send_order(req, gateway_name)
 
+    def check_order(self, req: OrderRequest, gateway_name: str) -> bool:
+        """执行内置风控检查及已启用的风控插件"""
+        if not self.check_risk(req, gateway_name):
+            return False
+
+        # 按顺序执行已启用的风控插件
+        for name, check in self.check_pipeline:
+            if not check(req, gateway_name):
+                self.log_plugin_reject(req, name)
+                return False
+
+        return True
+
+    def check_order_profiled(self, req: OrderRequest, gateway_name: str) -> bool:
+        """与check_order相同，同时记录各检查项及总耗时"""
+        profiler: LatencyProfiler = self.latency_profiler
+        result: bool = True
+
+        start: int = perf_counter_ns()
+
+        if self.active:
+            for name, check in self.builtin_checks:
+                check_start: int = perf_counter_ns()
+                result = check(req, gateway_name)
+                profiler.record(name, perf_counter_ns() - check_start)
+                if not result:
+                    break
+
+        if result:
+            for name, check in self.check_pipeline:
+                check_start: int = perf_counter_ns()
+                result = check(req, gateway_name)
+                profiler.record(name, perf_counter_ns() - check_start)
+                if not result:
+                    self.log_plugin_reject(req, name)
+                    break
+
+        profiler.record(LATENCY_TOTAL, perf_counter_ns() - start)
+        return result
+
+    def send_orders(self, reqs: List[OrderRequest], gateway_name: str) -> List[str]:
+        """
+        批量发送委托（篮子、多腿委托）。
+
+        整批委托一次性完成风控检查，返回与reqs一一对应的委托号，被拦截的委托为空字符串。
+        """
+        results: List[bool] = self.check_risk_batch(reqs, gateway_name)
+
+        vt_orderids: List[str] = []
+        for req, result in zip(reqs, results):
+            if not result:
+                vt_orderids.append("")
+                continue
+
+            self.order_flow_count += 1
+            if self.flow_limiter:
+                self.flow_limiter.record()
+
+            vt_orderids.append(self._send_order(req, gateway_name))
+
+        return vt_orderids
+
+    def check_risk_batch(self, reqs: List[OrderRequest], gateway_name: str) -> List[bool]:
+        """
+        批量风控检查，返回每笔委托是否通过。
+
+        批内已通过委托的流控、活动委托、开仓量及价值量占用会累计到后续委托的检查中，
+        账户、合约等查询结果在整批委托间共享。插件若实现check_batch_order则使用批量检查，
+        否则使用逐笔的check_risk。
+        """
+        batch: RiskBatch = RiskBatch(self, gateway_name)
+        results: List[bool] = []
+
+        for req in reqs:
+            result: bool = True
+
+            if self.active:
+                for name, check in self.builtin_checks:
+                    if not check(req, gateway_name, batch):
+                        result = False
+                        break
+
+            if result:
+                for name, check, batched in self.batch_pipeline:
+                    if batched:
+                        result = check(req, gateway_name, batch)
+                    else:
+                        result = check(req, gateway_name)
+
+                    if not result:
+                        self.log_plugin_reject(req, name)
+                        break
+
+            if result:
+                batch.add(req)
+            results.append(result)
+
+        return results
+
+    def set_latency_profile(self, active: bool) -> None:
+        """开启或关闭风控延时统计"""
+        self.latency_profile = active
+
+        if active:
+            if not self.latency_profiler:
+                self.latency_profiler = LatencyProfiler()
+        else:
+            self.latency_profiler = None
+
+    def get_latency_stats(self) -> Dict[str, dict]:
+        """获取各检查项及总耗时的p50/p99/max统计（纳秒）"""
+        if not self.latency_profiler:
+            return {}
+        return self.latency_profiler.get_stats()
+
     def load_check_risk_plugin(self, folder_path: str = ""):
         """
         Load risk plugin class from source code.
@@ -118,7 +410,6 @@ class RiskEngine(BaseEngine):
         import importlib
         from pathlib import Path
         from glob import glob
-        from types import MethodType
 
         # 若指定目录则从指定目录加载，否则从默认目录加载
         if folder_path:
@@ -134,29 +425,117 @@ class RiskEngine(BaseEngine):
             for name in dir(module):
                 value = getattr(module, name)
                 if isinstance(value, type) and issubclass(value, RiskEngine) and value is not RiskEngine:
-                    self.plugin_count += 1
-                    if hasattr(value, 'init_plugin'):
-                        self.init_plugin_count += 1
-                        setattr(self, f'init_plugin_{self.init_plugin_count}', MethodType(value.init_plugin, self))
-                    if hasattr(value, 'process_trade_event_'):
-                        setattr(self, f'process_trade_event_{self.plugin_count}',
-                                MethodType(value.process_trade_event_, self))
-                        self.event_engine.register(EVENT_TRADE,
-                                                   getattr(self, f'process_trade_event_{self.plugin_count}'))
-                    setattr(self, f'check_risk_{self.plugin_count}', MethodType(value.check_risk, self))
-                    self.write_log(f"风控插件{name}加载成功")
-        self.write_log(f"风控插件加载成功，共加载{self.plugin_count}个插件")
+                    self.add_plugin(value)
+
+        self.build_check_pipeline()
+        self.write_log(f"风控插件加载成功，共加载{len(self.plugins)}个插件")
+
+    def add_plugin(self, plugin_class: type) -> None:
+        """注册风控插件，插件方法绑定到风控引擎实例上执行"""
+        name: str = plugin_class.__name__
+        if name in self.plugins:
+            return
+
+        plugin: RiskPlugin = RiskPlugin(
+            name=name,
+            check_risk=MethodType(plugin_class.check_risk, self)
+        )
+
+        if hasattr(plugin_class, "init_plugin"):
+            plugin.init_plugin = MethodType(plugin_class.init_plugin, self)
+
+        if hasattr(plugin_class, "check_batch_order"):
+            plugin.check_batch_order = MethodType(plugin_class.check_batch_order, self)
+
+        if hasattr(plugin_class, "process_trade_event_"):
+            plugin.process_trade_event = MethodType(plugin_class.process_trade_event_, self)
+            self.event_engine.register(EVENT_TRADE, plugin.process_trade_event)
+
+        self.plugins[name] = plugin
+        self.write_log(f"风控插件{name}加载成功")
+
+    def build_check_pipeline(self) -> None:
+        """重建已启用插件的检查流水线"""
+        self.check_pipeline = tuple(
+            (plugin.name, plugin.check_risk)
+            for plugin in self.plugins.values()
+            if plugin.active
+        )
+
+        # 批量检查时优先使用插件的check_batch_order
+        self.batch_pipeline = tuple(
+            (plugin.name, plugin.check_batch_order, True) if plugin.check_batch_order
+            else (plugin.name, plugin.check_risk, False)
+            for plugin in self.plugins.values()
+            if plugin.active
+        )
+
+    def enable_plugin(self, name: str) -> bool:
+        """启用风控插件"""
+        return self.set_plugin_active(name, True)
+
+    def disable_plugin(self, name: str) -> bool:
+        """停用风控插件"""
+        return self.set_plugin_active(name, False)
+
+    def set_plugin_active(self, name: str, active: bool) -> bool:
+        """"""
+        plugin: Optional[RiskPlugin] = self.plugins.get(name, None)
+        if not plugin:
+            self.write_log(f"找不到风控插件{name}")
+            return False
+
+        if plugin.active != active:
+            plugin.active = active
+            self.build_check_pipeline()
+
+            if active:
+                self.write_log(f"风控插件{name}已启用")
+            else:
+                self.write_log(f"风控插件{name}已停用")
+        return True
 
     def update_setting(self, setting: dict) -> None:
         """"""
         self.active = setting["active"]
         self.order_flow_limit = setting["order_flow_limit"]
         self.order_flow_clear = setting["order_flow_clear"]
+        self.order_flow_mode = setting.get("order_flow_mode", self.order_flow_mode)
+        self.order_flow_window = setting.get("order_flow_window", self.order_flow_window)
+        self.order_flow_burst = setting.get("order_flow_burst", self.order_flow_burst)
         self.order_size_limit = setting["order_size_limit"]
         self.trade_limit = setting["trade_limit"]
         self.active_order_limit = setting["active_order_limit"]
         self.order_cancel_limit = setting["order_cancel_limit"]
 
+        self.init_flow_limiter()
+
+        self.reject_report_interval = setting.get("reject_report_interval", self.reject_report_interval)
+        self.account_max_age = setting.get("account_max_age", self.account_max_age)
+        self.exposure_limit = setting.get("exposure_limit", self.exposure_limit)
+        self.product_exposure_limits = setting.get("product_exposure_limits", self.product_exposure_limits)
+        self.portfolio_gross_limit = setting.get("portfolio_gross_limit", self.portfolio_gross_limit)
+        self.portfolio_net_limit = setting.get("portfolio_net_limit", self.portfolio_net_limit)
+        self.group_limits = setting.get("group_limits", self.group_limits)
+        self.product_groups = setting.get("product_groups", self.product_groups)
+        self.exposure_engine.set_groups(self.product_groups)
+
+        self.var_limit = setting.get("var_limit", self.var_limit)
+        self.var_confidence = setting.get("var_confidence", self.var_confidence)
+        self.var_horizon = setting.get("var_horizon", self.var_horizon)
+        self.var_interval = setting.get("var_interval", self.var_interval)
+        self.var_days = setting.get("var_days", self.var_days)
+        self.var_window = setting.get("var_window", self.var_window)
+        self.var_refresh = setting.get("var_refresh", self.var_refresh)
+        self.var_model.set_parameters(self.var_confidence, self.var_horizon)
+
+        self.latency_interval = setting.get("latency_interval", self.latency_interval)
+        self.set_latency_profile(setting.get("latency_profile", self.latency_profile))
+
+        for name, active in setting.get("plugin_active", {}).items():
+            if name in self.plugins:
+                self.set_plugin_active(name, active)
+
         if self.active:
             self.write_log("交易风控功能启动")
         else:
@@ -168,13 +547,46 @@ class RiskEngine(BaseEngine):
             "active": self.active,  # 风控运行状态
             "order_flow_limit": self.order_flow_limit,  # 委托流控上限（笔）
             "order_flow_clear": self.order_flow_clear,  # 委托流控清空（秒）
+            "order_flow_mode": self.order_flow_mode,  # 委托流控模式（counter/window/bucket）
+            "order_flow_window": self.order_flow_window,  # 委托流控窗口（毫秒）
+            "order_flow_burst": self.order_flow_burst,  # 委托流控突发上限（笔）
+            "reject_report_interval": self.reject_report_interval,  # 拒单汇总推送间隔（秒）
+            "account_max_age": self.account_max_age,  # 账户数据最大允许延迟（秒）
+            "exposure_limit": self.exposure_limit,  # 品种净敞口占资金比例上限
+            "product_exposure_limits": self.product_exposure_limits,  # 分品种净敞口比例上限
+            "portfolio_gross_limit": self.portfolio_gross_limit,  # 账户总敞口上限（名义价值）
+            "portfolio_net_limit": self.portfolio_net_limit,  # 账户净敞口上限（名义价值）
+            "product_groups": self.product_groups,  # 品种分组
+            "group_limits": self.group_limits,  # 分组总敞口/净敞口上限（名义价值）
+            "var_limit": self.var_limit,  # 组合VaR上限（金额）
+            "var_confidence": self.var_confidence,  # VaR置信度
+            "var_horizon": self.var_horizon,  # VaR持有期（K线周期数）
+            "var_interval": self.var_interval,  # 估计协方差使用的K线周期
+            "var_days": self.var_days,  # 估计协方差读取的K线天数
+            "var_window": self.var_window,  # 估计协方差使用的收益率个数
+            "var_refresh": self.var_refresh,  # 协方差矩阵刷新间隔（秒）
+            "latency_profile": self.latency_profile,  # 风控延时统计
+            "latency_interval": self.latency_interval,  # 延时统计推送间隔（秒）
             "order_size_limit": self.order_size_limit,  # 单笔委托上限（数量）
             "trade_limit": self.trade_limit,  # 总成交上限（笔）
             "active_order_limit": self.active_order_limit,  # 活动委托上限（笔）
             "order_cancel_limit": self.order_cancel_limit,  # 合约撤单上限（笔）
+            "plugin_active": {name: plugin.active for name, plugin in self.plugins.items()},  # 风控插件启用状态
         }
         return setting
 
+    def init_flow_limiter(self) -> None:
+        """根据流控模式创建委托流控器，计数模式沿用定时清空的计数器"""
+        window: float = self.order_flow_window / 1000
+
+        if self.order_flow_mode == FLOW_MODE_WINDOW:
+            self.flow_limiter = SlidingWindowLimiter(self.order_flow_limit, window)
+        elif self.order_flow_mode == FLOW_MODE_BUCKET:
+            burst: int = self.order_flow_burst or self.order_flow_limit
+            self.flow_limiter = TokenBucketLimiter(self.order_flow_limit, window, burst)
+        else:
+            self.flow_limiter = None
+
     def load_setting(self) -> None:
         """"""
         setting: dict = load_json(self.setting_filename)
@@ -192,6 +604,9 @@ class RiskEngine(BaseEngine):
         """"""
         self.event_engine.register(EVENT_TRADE, self.process_trade_event)
         self.event_engine.register(EVENT_TIMER, self.process_timer_event)
+        self.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
+        self.event_engine.register(EVENT_ACCOUNT, self.process_account_event)
+        self.event_engine.register(EVENT_POSITION, self.process_position_event)
         self.event_engine.register(EVENT_ORDER, self.process_order_event)
 
     def process_order_event(self, event: Event) -> None:
@@ -201,6 +616,9 @@ class RiskEngine(BaseEngine):
         order_book: ActiveOrderBook = self.get_order_book(order.vt_symbol)
         order_book.update_order(order)
 
+        self.update_active_order(order)
+        self.exposure_engine.update_order(order)
+
         if order.status == Status.CANCELLED:
             self.order_cancel_counts[order.vt_symbol] += 1
 
@@ -222,11 +640,163 @@ class RiskEngine(BaseEngine):
             
             self.event_engine.put(Event(EVENT_ORDER_ERROR_RECORD, order_error))
 
+    def process_position_event(self, event: Event) -> None:
+        """收到持仓推送时增量更新持仓索引"""
+        position: PositionData = event.data
+        self.update_position(position)
+
+    def update_position(self, position: PositionData) -> None:
+        """"""
+        positions: Optional[Dict[str, PositionData]] = self.symbol_positions.get(position.vt_symbol, None)
+        if positions is None:
+            positions = {}
+            self.symbol_positions[position.vt_symbol] = positions
+
+        product: str = self.get_symbol_info(position.vt_symbol).product
+        product_position: ProductPosition = self.get_product_position(product)
+
+        old_position: Optional[PositionData] = positions.get(position.vt_positionid, None)
+        if old_position:
+            product_position.update(old_position, -1)
+
+        positions[position.vt_positionid] = position
+        product_position.update(position, 1)
+
+        self.exposure_engine.update_position(position)
+
+    def rebuild_positions(self) -> None:
+        """从OMS重建持仓索引"""
+        self.symbol_positions.clear()
+        self.product_positions.clear()
+
+        for position in self.main_engine.get_all_positions():
+            self.update_position(position)
+
+    def process_account_event(self, event: Event) -> None:
+        """收到账户推送时更新该接口的账户快照"""
+        account: AccountData = event.data
+
+        vt_accountid: str = self.get_vt_accountid(account.gateway_name)
+        if account.vt_accountid != vt_accountid:
+            return
+
+        self.gateway_accounts[account.gateway_name] = account
+        self.account_update_times[account.gateway_name] = monotonic()
+
+    def process_contract_event(self, event: Event) -> None:
+        """收到合约推送时更新合约元数据缓存"""
+        contract: ContractData = event.data
+
+        info: Optional[SymbolInfo] = self.symbol_infos.get(contract.vt_symbol, None)
+        if not info:
+            info = SymbolInfo.from_vt_symbol(contract.vt_symbol)
+            self.symbol_infos[contract.vt_symbol] = info
+        info.update_contract(contract)
+
+    def get_symbol_info(self, vt_symbol: str) -> "SymbolInfo":
+        """获取合约元数据，首次查询时解析代码并从OMS读取合约信息"""
+        info: Optional[SymbolInfo] = self.symbol_infos.get(vt_symbol, None)
+        if info and info.size:
+            return info
+
+        if not info:
+            info = SymbolInfo.from_vt_symbol(vt_symbol)
+            self.symbol_infos[vt_symbol] = info
+
+        # 合约信息尚未推送时，后续查询继续尝试读取
+        contract: Optional[ContractData] = self.main_engine.get_contract(vt_symbol)
+        if contract:
+            info.update_contract(contract)
+
+        return info
+
+    def update_active_order(self, order: OrderData) -> None:
+        """增量更新活动委托计数"""
+        vt_orderid: str = order.vt_orderid
+
+        if order.is_active():
+            if vt_orderid not in self.active_orders:
+                self.active_order_count += 1
+                self.gateway_active_counts[order.gateway_name] += 1
+                self.symbol_active_counts[order.vt_symbol] += 1
+            self.active_orders[vt_orderid] = order
+        elif vt_orderid in self.active_orders:
+            self.active_orders.pop(vt_orderid)
+            self.active_order_count -= 1
+            self.gateway_active_counts[order.gateway_name] -= 1
+            self.symbol_active_counts[order.vt_symbol] -= 1
+
+    def rebuild_active_orders(self) -> None:
+        """从OMS重建活动委托计数"""
+        self.active_orders.clear()
+        self.active_order_count = 0
+        self.gateway_active_counts.clear()
+        self.symbol_active_counts.clear()
+
+        for order in self.main_engine.get_all_active_orders():
+            self.update_active_order(order)
+            self.exposure_engine.update_order(order)
+
+    def rebuild_exposure(self) -> None:
+        """清空敞口引擎，由OMS中的持仓及活动委托重建品种、分组及账户汇总"""
+        self.exposure_engine.clear()
+
+        for position in self.main_engine.get_all_positions():
+            self.exposure_engine.update_position(position)
+
+        for order in self.main_engine.get_all_active_orders():
+            self.exposure_engine.update_order(order)
+
+        self.var_model.load_exposures(self.exposure_engine.exposures)
+
+    def check_active_orders(self, repair: bool = False) -> bool:
+        """
+        将活动委托计数与OMS比对，返回是否一致。
+
+        repair为True时，不一致则从OMS重建计数。
+        """
+        oms_orders: List[OrderData] = self.main_engine.get_all_active_orders()
+
+        oms_ids: set = {order.vt_orderid for order in oms_orders}
+        local_ids: set = set(self.active_orders)
+
+        consistent: bool = (
+            oms_ids == local_ids
+            and self.active_order_count == len(local_ids)
+            and sum(self.gateway_active_counts.values()) == len(local_ids)
+            and sum(self.symbol_active_counts.values()) == len(local_ids)
+        )
+        if consistent:
+            return True
+
+        missing: set = oms_ids - local_ids
+        extra: set = local_ids - oms_ids
+        self.write_log(
+            f"活动委托计数与OMS不一致，本地{self.active_order_count}笔，OMS{len(oms_ids)}笔，"
+            f"缺失{sorted(missing)}，多余{sorted(extra)}"
+        )
+
+        if repair:
+            self.rebuild_active_orders()
+            self.write_log("活动委托计数已从OMS重建")
+
+        return False
+
+    def get_active_order_count(self, gateway_name: str = "", vt_symbol: str = "") -> int:
+        """查询活动委托数量，可按接口或合约过滤"""
+        if vt_symbol:
+            return self.symbol_active_counts.get(vt_symbol, 0)
+        elif gateway_name:
+            return self.gateway_active_counts.get(gateway_name, 0)
+        return self.active_order_count
+
     def process_trade_event(self, event: Event) -> None:
         """"""
         trade: TradeData = event.data
         self.trade_count += trade.volume
 
+        self.exposure_engine.update_trade(trade)
+
     def process_timer_event(self, event: Event) -> None:
         """"""
         self.order_flow_timer += 1
@@ -235,11 +805,72 @@ class RiskEngine(BaseEngine):
             self.order_flow_count = 0
             self.order_flow_timer = 0
 
+        if self.reject_stats:
+            self.reject_report_timer += 1
+            if self.reject_report_timer >= self.reject_report_interval:
+                self.reject_report_timer = 0
+                self.flush_rejections()
+
+        if self.latency_profiler:
+            self.latency_timer += 1
+            if self.latency_timer >= self.latency_interval:
+                self.latency_timer = 0
+                self.event_engine.put(Event(EVENT_RISK_LATENCY, self.get_latency_stats()))
+
+        if self.var_limit:
+            self.process_var_timer()
+
         # self.position_timer += 1
         # if self.position_timer >= self.position_flash:
         #     self.position_timer = 0
         #     self.save_positions()
 
+    def process_var_timer(self) -> None:
+        """替换后台估计完成的协方差矩阵，并按间隔启动下一次估计"""
+        if self.var_model.install_pending(self.exposure_engine.exposures):
+            self.write_log(f"VaR协方差矩阵更新，共{len(self.var_model.products)}个品种")
+
+        self.var_timer += 1
+        if self.var_timer < self.var_refresh:
+            return
+        self.var_timer = 0
+
+        if self.var_model.error:
+            self.write_log(f"VaR协方差矩阵估计失败：{self.var_model.error}")
+
+        self.var_model.start_estimate(
+            self.get_var_symbols(),
+            Interval(self.var_interval),
+            self.var_days,
+            self.var_window
+        )
+
+    def get_symbol_normalizer(self) -> SymbolNormalizer:
+        """与数据记录引擎一致的合约代码规范化，优先使用已启动的RecorderEngineCtp的实例"""
+        recorder_engine: Optional[BaseEngine] = self.main_engine.engines.get(RECORDER_APP_NAME, None)
+        normalizer: Optional[SymbolNormalizer] = getattr(recorder_engine, "normalizer", None)
+        if normalizer:
+            return normalizer
+
+        return SymbolNormalizer.from_setting(load_json(RecorderEngine.setting_filename))
+
+    def get_var_symbols(self) -> Dict[str, Tuple[str, Exchange]]:
+        """各期货品种在数据库中的连续合约代码（与RecorderEngineCtp的代码规范化一致）"""
+        symbols: Dict[str, Tuple[str, Exchange]] = {}
+        normalizer: SymbolNormalizer = self.get_symbol_normalizer()
+
+        for contract in self.main_engine.get_all_contracts():
+            if contract.product != Product.FUTURES:
+                continue
+
+            # 配置主力合约表时只有主力合约转换为连续合约代码，优先使用转换后的代码
+            product: str = extract_product(contract.symbol)
+            symbol: str = normalizer.normalize(contract.symbol)
+            if product not in symbols or symbol != contract.symbol:
+                symbols[product] = (symbol, contract.exchange)
+
+        return symbols
+
     def get_balance(self, gateway_name: str = "CTP") -> float:
         # 法1
         # self.accs: Dict[str, AccountData] = self.main_engine.get_engine('oms').accounts
@@ -261,21 +892,48 @@ class RiskEngine(BaseEngine):
         #     return 0
         # return self.acc.balance
 
-        # 法4：兼容版
-        # 获取vt_accountid
-        vt_accountid = self.get_vt_accountid(gateway_name)
-        if not vt_accountid:
-            return 0
-
-        # 获取账户信息
-        account = self.main_engine.get_account(vt_accountid)
+        # 法5：读取账户推送维护的快照缓存
+        account: Optional[AccountData] = self.gateway_accounts.get(gateway_name, None)
 
         if not account:
-            self.write_log(f"找不到账户{vt_accountid}")
-            return 0
+            # 法4：兼容版，尚未收到账户推送时从OMS查询
+            # 获取vt_accountid
+            vt_accountid = self.get_vt_accountid(gateway_name)
+            if not vt_accountid:
+                return 0
+
+            # 获取账户信息
+            account = self.main_engine.get_account(vt_accountid)
+
+            if not account:
+                self.write_log(f"找不到账户{vt_accountid}")
+                return 0
+
+            self.gateway_accounts[gateway_name] = account
+
+        # 账户数据过旧时返回STALE_BALANCE，由调用方按get_balance_msg拒单
+        if self.account_max_age and self.get_account_age(gateway_name) > self.account_max_age:
+            return STALE_BALANCE
 
         return account.balance
 
+    def get_balance_msg(self, balance: float, gateway_name: str = "CTP") -> str:
+        """账户资金不可用（0或STALE_BALANCE）时的拒单原因"""
+        if balance != STALE_BALANCE:
+            return f"无法获取账户资金[{gateway_name}]，拒绝订单"
+
+        age: float = self.get_account_age(gateway_name)
+        if age == float("inf"):
+            return f"尚未收到账户推送[{gateway_name}]，账户数据可能已过期，拒绝订单"
+        return f"账户数据已过期[{gateway_name}]，距上次推送{age:.1f}秒，超过{self.account_max_age}秒，拒绝订单"
+
+    def get_account_age(self, gateway_name: str = "CTP") -> float:
+        """距离上次收到账户推送的秒数，尚未收到推送返回inf"""
+        update_time: Optional[float] = self.account_update_times.get(gateway_name, None)
+        if update_time is None:
+            return float("inf")
+        return monotonic() - update_time
+
     # def get_accountid(self) -> str:
     #     gateway_name: str = 'CTP'
     #     gateway: BaseGateway = self.main_engine.get_gateway(gateway_name)
@@ -284,6 +942,18 @@ class RiskEngine(BaseEngine):
     #     return accountid
 
     def get_vt_accountid(self, gateway_name: str = "CTP") -> str:
+        """获取接口对应的vt_accountid，解析成功后缓存"""
+        vt_accountid: str = self.vt_accountids.get(gateway_name, "")
+        if vt_accountid:
+            return vt_accountid
+
+        vt_accountid = self.resolve_vt_accountid(gateway_name)
+        if vt_accountid:
+            self.vt_accountids[gateway_name] = vt_accountid
+        return vt_accountid
+
+    def resolve_vt_accountid(self, gateway_name: str) -> str:
+        """"""
         if gateway_name == "BINANCE_LINEAR":
             return f"{gateway_name}.USDT"
 
@@ -294,6 +964,8 @@ class RiskEngine(BaseEngine):
                 return ""
             td_api: "CtpTdApi" = gateway.td_api
             accountid: str = td_api.userid
+            if not accountid:
+                return ""
             return f"{gateway_name}.{accountid}"
 
         else:
@@ -313,8 +985,19 @@ class RiskEngine(BaseEngine):
 
     # 根据vt_symbol获取对应的持仓列表
     def get_symbol_positions(self, vt_symbol) -> List[PositionData]:
-        self.positions: List[PositionData] = self.main_engine.get_all_positions()
-        return [position for position in self.positions if position.vt_symbol == vt_symbol and position.volume != 0]
+        positions: Optional[Dict[str, PositionData]] = self.symbol_positions.get(vt_symbol, None)
+        if not positions:
+            return []
+        # 先复制持仓列表，避免事件线程同时更新索引
+        return [position for position in list(positions.values()) if position.volume != 0]
+
+    def get_product_position(self, product: str) -> "ProductPosition":
+        """获取品种持仓汇总"""
+        product_position: Optional[ProductPosition] = self.product_positions.get(product, None)
+        if not product_position:
+            product_position = ProductPosition(product)
+            self.product_positions[product] = product_position
+        return product_position
 
     def save_mysql(self, positions) -> None:
         # 1.删除
@@ -353,77 +1036,325 @@ class RiskEngine(BaseEngine):
             error_code=-1,  # 风控拒单统一使用-1
             error_msg=msg,
             orderid="-1",   # 风控拒单时还没有orderid
+            create_date=datetime.now(),
             gateway_name=gateway_name
         )
         self.event_engine.put(Event(EVENT_ORDER_ERROR_RECORD, order_error))
 
+    def reject_order(self, req: OrderRequest, msg: str, gateway_name: str, rule: str) -> None:
+        """
+        风控拒单上报。
+
+        同一合约同一规则在汇总间隔内只有首次拒单立即输出日志和拒单记录，
+        后续拒单仅计数，由定时器合并为一条汇总输出。
+        """
+        if not self.reject_report_interval:
+            self.write_log(msg)
+            self.record_order_error(req, msg, gateway_name)
+            return
+
+        key: Tuple[str, str] = (req.vt_symbol, rule)
+        stat: Optional[RejectStat] = self.reject_stats.get(key, None)
+
+        if not stat:
+            self.reject_stats[key] = RejectStat(req, gateway_name, msg)
+            self.write_log(msg)
+            self.record_order_error(req, msg, gateway_name)
+        else:
+            stat.req = req
+            stat.gateway_name = gateway_name
+            stat.msg = msg
+            stat.count += 1
+
+    def log_plugin_reject(self, req: OrderRequest, name: str) -> None:
+        """输出插件拦截日志，合并期间内的重复拦截不再输出"""
+        stat: Optional[RejectStat] = self.reject_stats.get((req.vt_symbol, name), None)
+        if not stat or not stat.count:
+            self.write_log(f"风控插件{name}拦截此笔委托")
+
+    def flush_rejections(self) -> None:
+        """输出汇总间隔内被合并的拒单"""
+        # 先整体替换，策略线程此后的拒单计入新的字典，不在遍历期间修改
+        stats: Dict[Tuple[str, str], RejectStat] = self.reject_stats
+        self.reject_stats = {}
+
+        for (vt_symbol, rule), stat in stats.items():
+            if not stat.count:
+                continue
+
+            msg: str = (
+                f"{vt_symbol}触发{rule}规则，{self.reject_report_interval}秒内另拦截{stat.count}笔委托，"
+                f"最近一次：{stat.msg}"
+            )
+            self.write_log(msg)
+            self.record_order_error(stat.req, msg, stat.gateway_name)
+
     def check_risk(self, req: OrderRequest, gateway_name: str) -> bool:
         """"""
         if not self.active:
             return True
 
-        # Check order volume
+        for name, check in self.builtin_checks:
+            if not check(req, gateway_name):
+                return False
+
+        return True
+
+    def check_order_volume(self, req: OrderRequest, gateway_name: str, batch: Optional["RiskBatch"] = None) -> bool:
+        """检查委托数量"""
         if req.volume <= 0:
             msg = "委托数量必须大于0"
-            self.write_log(msg)
-            self.record_order_error(req, msg, gateway_name)
+            self.reject_order(req, msg, gateway_name, "order_volume")
             return False
 
         if req.volume > self.order_size_limit:
             msg = f"单笔委托数量{req.volume}，超过限制{self.order_size_limit}"
-            self.write_log(msg)
-            self.record_order_error(req, msg, gateway_name)
+            self.reject_order(req, msg, gateway_name, "order_volume")
             return False
 
-        # Check trade volume
+        return True
+
+    def check_trade_volume(self, req: OrderRequest, gateway_name: str, batch: Optional["RiskBatch"] = None) -> bool:
+        """检查总成交数量（批内委托尚未成交，不计入）"""
         if self.trade_count >= self.trade_limit:
             msg = f"今日总成交合约数量{self.trade_count}，超过限制{self.trade_limit}"
-            self.write_log(msg)
-            self.record_order_error(req, msg, gateway_name)
+            self.reject_order(req, msg, gateway_name, "trade_volume")
             return False
 
-        # Check flow count
-        if self.order_flow_count >= self.order_flow_limit:
-            msg = f"委托流数量{self.order_flow_count}，超过限制每{self.order_flow_clear}秒{self.order_flow_limit}次"
-            self.write_log(msg)
-            self.record_order_error(req, msg, gateway_name)
+        return True
+
+    def check_order_flow(self, req: OrderRequest, gateway_name: str, batch: Optional["RiskBatch"] = None) -> bool:
+        """检查委托流控"""
+        if self.flow_limiter:
+            if batch:
+                if batch.flow_available is None:
+                    batch.flow_available = self.flow_limiter.get_available()
+                allowed: bool = batch.count < batch.flow_available
+            else:
+                allowed: bool = self.flow_limiter.check()
+
+            if not allowed:
+                msg = f"委托流数量超过限制每{self.order_flow_window}毫秒{self.order_flow_limit}次"
+                self.reject_order(req, msg, gateway_name, "order_flow")
+                return False
+            return True
+
+        order_flow_count: int = self.order_flow_count
+        if batch:
+            order_flow_count += batch.count
+
+        if order_flow_count >= self.order_flow_limit:
+            msg = f"委托流数量{order_flow_count}，超过限制每{self.order_flow_clear}秒{self.order_flow_limit}次"
+            self.reject_order(req, msg, gateway_name, "order_flow")
             return False
 
-        # Check all active orders
-        active_order_count: int = len(self.main_engine.get_all_active_orders())
+        return True
+
+    def check_active_order_limit(self, req: OrderRequest, gateway_name: str, batch: Optional["RiskBatch"] = None) -> bool:
+        """检查活动委托数量"""
+        active_order_count: int = self.active_order_count
+        if batch:
+            active_order_count += batch.count
+
         if active_order_count >= self.active_order_limit:
             msg = f"当前活动委托次数{active_order_count}，超过限制{self.active_order_limit}"
-            self.write_log(msg)
-            self.record_order_error(req, msg, gateway_name)
+            self.reject_order(req, msg, gateway_name, "active_order")
             return False
 
-        # Check order cancel counts
+        return True
+
+    def check_order_cancel(self, req: OrderRequest, gateway_name: str, batch: Optional["RiskBatch"] = None) -> bool:
+        """检查合约撤单次数"""
         order_cancel_count: int = self.order_cancel_counts.get(req.vt_symbol, 0)
         if order_cancel_count >= self.order_cancel_limit:
             msg = f"当日{req.vt_symbol}撤单次数{order_cancel_count}，超过限制{self.order_cancel_limit}"
-            self.write_log(msg)
-            self.record_order_error(req, msg, gateway_name)
+            self.reject_order(req, msg, gateway_name, "order_cancel")
             return False
 
-        # Check order self trade
+        return True
+
+    def check_self_trade(self, req: OrderRequest, gateway_name: str, batch: Optional["RiskBatch"] = None) -> bool:
+        """检查自成交"""
         order_book: ActiveOrderBook = self.get_order_book(req.vt_symbol)
         if req.direction == Direction.LONG:
             best_ask: float = order_book.get_best_ask()
+            if batch:
+                best_ask = batch.get_best_ask(req.vt_symbol, best_ask)
+
             if best_ask and req.price >= best_ask:
                 msg = f"买入价格{req.price}大于等于已挂最低卖价{best_ask}，可能导致自成交"
-                self.write_log(msg)
-                self.record_order_error(req, msg, gateway_name)
+                self.reject_order(req, msg, gateway_name, "self_trade")
                 return False
         else:
             best_bid: float = order_book.get_best_bid()
+            if batch:
+                best_bid = batch.get_best_bid(req.vt_symbol, best_bid)
+
             if best_bid and req.price <= best_bid:
                 msg = f"卖出价格{req.price}小于等于已挂最低买价{best_bid}，可能导致自成交"
-                self.write_log(msg)
-                self.record_order_error(req, msg, gateway_name)
+                self.reject_order(req, msg, gateway_name, "self_trade")
+                return False
+
+        return True
+
+    def check_exposure(self, req: OrderRequest, gateway_name: str, batch: Optional["RiskBatch"] = None) -> bool:
+        """检查品种净敞口占账户资金比例"""
+        info: SymbolInfo = self.get_symbol_info(req.vt_symbol)
+        limit: float = self.product_exposure_limits.get(info.product, self.exposure_limit)
+        if not limit:
+            return True
+
+        return self.check_exposure_ratio(req, gateway_name, limit, "exposure", batch)
+
+    def check_exposure_ratio(
+        self,
+        req: OrderRequest,
+        gateway_name: str,
+        limit: float,
+        rule: str,
+        batch: Optional["RiskBatch"] = None
+    ) -> bool:
+        """检查委托成交后品种净敞口（含持仓、成交、活动委托及本笔委托）是否超过账户资金的limit比例"""
+        info: SymbolInfo = self.get_symbol_info(req.vt_symbol)
+
+        net: float = self.exposure_engine.get_exposure(info.product).net
+        if batch:
+            net += batch.net_values.get(info.product, 0)
+
+        value: float = req.volume * req.price * info.size
+        if req.direction == Direction.LONG:
+            new_net: float = net + value
+        else:
+            new_net: float = net - value
+
+        # 减少敞口的委托始终允许
+        if abs(new_net) <= abs(net):
+            return True
+
+        if batch:
+            balance: float = batch.get_balance()
+        else:
+            balance: float = self.get_balance(gateway_name)
+
+        if not balance or balance == STALE_BALANCE:
+            msg = self.get_balance_msg(balance, gateway_name)
+            self.reject_order(req, msg, gateway_name, rule)
+            return False
+
+        if abs(new_net) > balance * limit:
+            msg = f"品种{info.product}委托后净敞口{new_net:.2f}，超过账户资金{balance:.2f}的{limit:.2%}"
+            self.reject_order(req, msg, gateway_name, rule)
+            return False
+
+        return True
+
+    def check_portfolio(self, req: OrderRequest, gateway_name: str, batch: Optional["RiskBatch"] = None) -> bool:
+        """检查账户及品种分组的总敞口、净敞口名义价值上限"""
+        info: SymbolInfo = self.get_symbol_info(req.vt_symbol)
+        groups: List[str] = self.exposure_engine.product_groups.get(info.product, [])
+        if not (self.portfolio_gross_limit or self.portfolio_net_limit or groups):
+            return True
+
+        value: float = req.volume * req.price * info.size
+
+        # 开仓增加总敞口，平仓减少反方向敞口
+        if is_open(req.offset):
+            gross_delta: float = value
+        else:
+            gross_delta: float = -value
+
+        if req.direction == Direction.LONG:
+            net_delta: float = value
+        else:
+            net_delta: float = -value
+
+        total: ProductExposure = self.exposure_engine.total
+        gross: float = total.gross
+        net: float = total.net
+        if batch:
+            gross += batch.gross_total
+            net += batch.net_total
+
+        if not self.check_notional(
+            req, gateway_name, "账户", gross, net, gross_delta, net_delta,
+            self.portfolio_gross_limit, self.portfolio_net_limit
+        ):
+            return False
+
+        for group in groups:
+            limits: Optional[Dict[str, float]] = self.group_limits.get(group, None)
+            if not limits:
+                continue
+
+            exposure: ProductExposure = self.exposure_engine.group_exposures[group]
+            gross: float = exposure.gross
+            net: float = exposure.net
+            if batch:
+                gross += batch.get_group_value(batch.gross_values, group)
+                net += batch.get_group_value(batch.net_values, group)
+
+            if not self.check_notional(
+                req, gateway_name, f"分组{group}", gross, net, gross_delta, net_delta,
+                limits.get("gross", 0), limits.get("net", 0)
+            ):
                 return False
 
         return True
 
+    def check_notional(
+        self,
+        req: OrderRequest,
+        gateway_name: str,
+        name: str,
+        gross: float,
+        net: float,
+        gross_delta: float,
+        net_delta: float,
+        gross_limit: float,
+        net_limit: float
+    ) -> bool:
+        """检查委托成交后的总敞口及净敞口，减少敞口的委托始终允许"""
+        new_gross: float = gross + gross_delta
+        if gross_limit and gross_delta > 0 and new_gross > gross_limit:
+            msg = f"{name}委托后总敞口{new_gross:.2f}，超过上限{gross_limit:.2f}"
+            self.reject_order(req, msg, gateway_name, "portfolio")
+            return False
+
+        new_net: float = net + net_delta
+        if net_limit and abs(new_net) > abs(net) and abs(new_net) > net_limit:
+            msg = f"{name}委托后净敞口{new_net:.2f}，超过上限{net_limit:.2f}"
+            self.reject_order(req, msg, gateway_name, "portfolio")
+            return False
+
+        return True
+
+    def check_var(self, req: OrderRequest, gateway_name: str, batch: Optional["RiskBatch"] = None) -> bool:
+        """检查委托成交后的组合VaR，协方差矩阵尚未估计完成时不检查"""
+        if not self.var_limit or not self.var_model.is_ready():
+            return True
+
+        info: SymbolInfo = self.get_symbol_info(req.vt_symbol)
+        value: float = req.volume * req.price * info.size
+        if req.direction == Direction.SHORT:
+            value = -value
+
+        if batch:
+            var: float = self.var_model.get_var_after(batch.net_values)
+            deltas: Dict[str, float] = dict(batch.net_values)
+            deltas[info.product] = deltas.get(info.product, 0) + value
+        else:
+            var: float = self.var_model.get_var()
+            deltas: Dict[str, float] = {info.product: value}
+
+        # 降低VaR的委托始终允许
+        new_var: float = self.var_model.get_var_after(deltas)
+        if new_var <= var or new_var <= self.var_limit:
+            return True
+
+        msg = f"委托后组合VaR{new_var:.2f}，超过上限{self.var_limit:.2f}"
+        self.reject_order(req, msg, gateway_name, "var")
+        return False
+
     def get_order_book(self, vt_symbol: str) -> "ActiveOrderBook":
         """"""
         order_book: Optional[ActiveOrderBook] = self.active_order_books.get(vt_symbol, None)
@@ -433,6 +1364,222 @@ class RiskEngine(BaseEngine):
         return order_book
 
 
+class FlowLimiter(ABC):
+    """委托流控器基类"""
+
+    @abstractmethod
+    def check(self) -> bool:
+        """检查当前是否允许发出委托"""
+        pass
+
+    @abstractmethod
+    def record(self) -> None:
+        """记录一笔已发出的委托"""
+        pass
+
+    @abstractmethod
+    def get_available(self) -> int:
+        """获取当前还允许发出的委托笔数"""
+        pass
+
+
+class SlidingWindowLimiter(FlowLimiter):
+    """滑动窗口流控（环形缓冲记录最近limit笔委托的单调时钟时间戳）"""
+
+    def __init__(self, limit: int, window: float) -> None:
+        """"""
+        self.limit: int = limit
+        self.window: float = window
+
+        self.timestamps: Deque[float] = deque(maxlen=max(limit, 1))
+
+    def check(self) -> bool:
+        """"""
+        if self.limit <= 0:
+            return False
+
+        if len(self.timestamps) < self.limit:
+            return True
+
+        # 最早一笔委托已移出窗口才允许
+        return monotonic() - self.timestamps[0] >= self.window
+
+    def record(self) -> None:
+        """"""
+        self.timestamps.append(monotonic())
+
+    def get_available(self) -> int:
+        """"""
+        if self.limit <= 0:
+            return 0
+
+        # 时间戳按先后排列，从最早一笔开始统计已移出窗口的数量
+        now: float = monotonic()
+        expired: int = 0
+        for timestamp in self.timestamps:
+            if now - timestamp < self.window:
+                break
+            expired += 1
+
+        return self.limit - len(self.timestamps) + expired
+
+
+class TokenBucketLimiter(FlowLimiter):
+    """令牌桶流控（每window秒补充limit个令牌，最多积累burst个）"""
+
+    def __init__(self, limit: int, window: float, burst: int) -> None:
+        """"""
+        self.rate: float = limit / window if window > 0 else 0
+        self.burst: int = burst
+
+        self.tokens: float = burst
+        self.last: float = monotonic()
+
+    def check(self) -> bool:
+        """"""
+        now: float = monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+        return self.tokens >= 1
+
+    def record(self) -> None:
+        """"""
+        self.tokens -= 1
+
+    def get_available(self) -> int:
+        """"""
+        self.check()
+        return int(self.tokens)
+
+
+class RiskBatch:
+    """批量风控检查上下文，记录批内已通过委托的累计占用，并缓存整批共享的查询结果"""
+
+    def __init__(self, risk_engine: RiskEngine, gateway_name: str) -> None:
+        """"""
+        self.risk_engine: RiskEngine = risk_engine
+        self.gateway_name: str = gateway_name
+
+        self.count: int = 0
+        self.open_volumes: Dict[str, float] = defaultdict(float)
+        self.net_values: Dict[str, float] = defaultdict(float)
+        self.gross_values: Dict[str, float] = defaultdict(float)
+        self.gross_total: float = 0
+        self.net_total: float = 0
+        self.flow_available: Optional[int] = None
+
+        self.bid_prices: Dict[str, float] = {}
+        self.ask_prices: Dict[str, float] = {}
+
+        self.balance: Optional[float] = None
+
+        # 供插件存放批内共享数据
+        self.data: Dict[str, Any] = {}
+
+    def add(self, req: OrderRequest) -> None:
+        """记录一笔通过检查的委托"""
+        self.count += 1
+
+        if req.offset == Offset.OPEN:
+            self.open_volumes[req.vt_symbol] += req.volume
+
+        info: SymbolInfo = self.risk_engine.get_symbol_info(req.vt_symbol)
+        value: float = req.volume * req.price * info.size
+
+        if req.direction == Direction.LONG:
+            self.net_values[info.product] += value
+            self.net_total += value
+        else:
+            self.net_values[info.product] -= value
+            self.net_total -= value
+
+        if is_open(req.offset):
+            self.gross_values[info.product] += value
+            self.gross_total += value
+        else:
+            self.gross_values[info.product] -= value
+            self.gross_total -= value
+
+        if req.direction == Direction.LONG:
+            best_bid: float = self.bid_prices.get(req.vt_symbol, 0)
+            if req.price > best_bid:
+                self.bid_prices[req.vt_symbol] = req.price
+        else:
+            best_ask: float = self.ask_prices.get(req.vt_symbol, 0)
+            if not best_ask or req.price < best_ask:
+                self.ask_prices[req.vt_symbol] = req.price
+
+    def get_best_bid(self, vt_symbol: str, book_bid: float) -> float:
+        """合并活动委托簿与批内委托的最高买价"""
+        batch_bid: float = self.bid_prices.get(vt_symbol, 0)
+        return max(book_bid, batch_bid)
+
+    def get_best_ask(self, vt_symbol: str, book_ask: float) -> float:
+        """合并活动委托簿与批内委托的最低卖价"""
+        batch_ask: float = self.ask_prices.get(vt_symbol, 0)
+        if not batch_ask:
+            return book_ask
+        if not book_ask:
+            return batch_ask
+        return min(book_ask, batch_ask)
+
+    def get_group_value(self, values: Dict[str, float], group: str) -> float:
+        """汇总批内委托在品种分组上的累计值"""
+        product_groups: Dict[str, List[str]] = self.risk_engine.exposure_engine.product_groups
+        return sum(value for product, value in values.items() if group in product_groups.get(product, ()))
+
+    def get_balance(self) -> float:
+        """查询账户资金（批内缓存）"""
+        if self.balance is None:
+            self.balance = self.risk_engine.get_balance(self.gateway_name)
+        return self.balance
+
+
+class PriceLevels:
+    """价格档位（惰性删除堆，记录每档委托笔数）"""
+
+    def __init__(self, descending: bool) -> None:
+        """"""
+        self.sign: int = -1 if descending else 1
+
+        self.heap: List[float] = []
+        self.counts: Dict[float, int] = {}
+
+    def add(self, price: float) -> None:
+        """增加一笔该价位委托"""
+        count: int = self.counts.get(price, 0)
+        self.counts[price] = count + 1
+
+        if not count:
+            heappush(self.heap, self.sign * price)
+
+    def remove(self, price: float) -> None:
+        """移除一笔该价位委托"""
+        count: int = self.counts[price] - 1
+        if count:
+            self.counts[price] = count
+            return
+
+        del self.counts[price]
+
+        # 清理堆顶已失效的价位，保证best为O(1)
+        heap: List[float] = self.heap
+        while heap and heap[0] * self.sign not in self.counts:
+            heappop(heap)
+
+        # 失效价位过多时重建堆，避免内存膨胀
+        if len(heap) > 2 * len(self.counts) + 64:
+            self.heap = [self.sign * p for p in self.counts]
+            heapify(self.heap)
+
+    def best(self) -> float:
+        """获取最优价位"""
+        if not self.heap:
+            return 0
+        return self.heap[0] * self.sign
+
+
 class ActiveOrderBook:
     """活动委托簿"""
 
@@ -443,27 +1590,40 @@ class ActiveOrderBook:
         self.bid_prices: Dict[str, float] = {}
         self.ask_prices: Dict[str, float] = {}
 
+        self.bid_levels: PriceLevels = PriceLevels(descending=True)
+        self.ask_levels: PriceLevels = PriceLevels(descending=False)
+
     def update_order(self, order: OrderData) -> None:
         """更新委托数据"""
         if order.is_active():
             if order.direction == Direction.LONG:
-                self.bid_prices[order.vt_orderid] = order.price
+                self.add_price(self.bid_prices, self.bid_levels, order)
             else:
-                self.ask_prices[order.vt_orderid] = order.price
+                self.add_price(self.ask_prices, self.ask_levels, order)
         else:
             if order.vt_orderid in self.bid_prices:
-                self.bid_prices.pop(order.vt_orderid)
+                price: float = self.bid_prices.pop(order.vt_orderid)
+                self.bid_levels.remove(price)
             elif order.vt_orderid in self.ask_prices:
-                self.ask_prices.pop(order.vt_orderid)
+                price: float = self.ask_prices.pop(order.vt_orderid)
+                self.ask_levels.remove(price)
+
+    def add_price(self, prices: Dict[str, float], levels: PriceLevels, order: OrderData) -> None:
+        """记录活动委托价格"""
+        old_price: Optional[float] = prices.get(order.vt_orderid, None)
+        if old_price == order.price:
+            return
+
+        if old_price is not None:
+            levels.remove(old_price)
+
+        prices[order.vt_orderid] = order.price
+        levels.add(order.price)
 
     def get_best_bid(self) -> float:
         """获取最高买价"""
-        if not self.bid_prices:
-            return 0
-        return max(self.bid_prices.values())
+        return self.bid_levels.best()
 
     def get_best_ask(self) -> float:
         """获取最低卖价"""
-        if not self.ask_prices:
-            return 0
-        return min(self.ask_prices.values())
+        return self.ask_levels.best()
@@ -0,0 +1,213 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from vnpy.trader.constant import Direction, Offset
+from vnpy.trader.object import OrderData, PositionData, TradeData
+
+if TYPE_CHECKING:
+    from .engine import SymbolInfo
+
+
+KIND_POSITION = "position"
+KIND_TRADE = "trade"
+KIND_PENDING = "pending"
+
+
+@dataclass
+class ProductExposure:
+    """品种敞口（名义价值，含合约乘数），也用于分组及账户汇总"""
+
+    product: str
+
+    position_long: float = 0    # 持仓多头
+    position_short: float = 0   # 持仓空头
+    trade_long: float = 0       # 持仓推送前的成交多头增量
+    trade_short: float = 0      # 持仓推送前的成交空头增量
+    pending_long: float = 0     # 活动开仓委托多头
+    pending_short: float = 0    # 活动开仓委托空头
+
+    @property
+    def long(self) -> float:
+        """"""
+        return self.position_long + self.trade_long + self.pending_long
+
+    @property
+    def short(self) -> float:
+        """"""
+        return self.position_short + self.trade_short + self.pending_short
+
+    @property
+    def net(self) -> float:
+        """"""
+        return self.long - self.short
+
+    @property
+    def gross(self) -> float:
+        """"""
+        return self.long + self.short
+
+    def add(self, kind: str, long_value: float, short_value: float) -> None:
+        """"""
+        if kind == KIND_POSITION:
+            self.position_long += long_value
+            self.position_short += short_value
+        elif kind == KIND_TRADE:
+            self.trade_long += long_value
+            self.trade_short += short_value
+        else:
+            self.pending_long += long_value
+            self.pending_short += short_value
+
+
+def is_open(offset: Offset) -> bool:
+    """开仓或净持仓模式下的委托会增加敞口"""
+    return offset == Offset.OPEN or offset == Offset.NONE
+
+
+class ExposureEngine:
+    """
+    品种敞口引擎。
+
+    由持仓、成交、委托推送增量维护各品种的多空名义价值，
+    活动开仓委托的未成交部分计入挂单敞口。
+    每次变化同时累加到所属品种分组及账户汇总，组合层面的检查无需重新汇总。
+    """
+
+    def __init__(self, get_symbol_info: Callable[[str], "SymbolInfo"]) -> None:
+        """"""
+        self.get_symbol_info: Callable[[str], "SymbolInfo"] = get_symbol_info
+
+        self.exposures: Dict[str, ProductExposure] = {}
+        self.total: ProductExposure = ProductExposure("")
+
+        # 品种分组，一个品种可属于多个分组
+        self.product_groups: Dict[str, List[str]] = {}
+        self.group_exposures: Dict[str, ProductExposure] = {}
+
+        # 各数据对敞口的贡献，更新时先扣除旧值
+        self.position_values: Dict[str, Tuple[str, float, float]] = {}
+        self.order_values: Dict[str, Tuple[str, float, float]] = {}
+        self.trade_values: Dict[str, Tuple[str, float, float]] = {}
+
+        # 品种净敞口变化回调（品种，净敞口变化量），供VaR模型增量更新
+        self.net_callback: Optional[Callable[[str, float], None]] = None
+
+    def get_exposure(self, product: str) -> ProductExposure:
+        """"""
+        exposure: Optional[ProductExposure] = self.exposures.get(product, None)
+        if not exposure:
+            exposure = ProductExposure(product)
+            self.exposures[product] = exposure
+        return exposure
+
+    def get_group_exposure(self, group: str) -> Optional[ProductExposure]:
+        """"""
+        return self.group_exposures.get(group, None)
+
+    def set_groups(self, groups: Dict[str, List[str]]) -> None:
+        """设置品种分组，并由当前各品种敞口重建分组汇总"""
+        self.product_groups = {}
+        self.group_exposures = {}
+
+        for group, products in groups.items():
+            group_exposure: ProductExposure = ProductExposure(group)
+            self.group_exposures[group] = group_exposure
+
+            for product in products:
+                self.product_groups.setdefault(product, []).append(group)
+
+                exposure: Optional[ProductExposure] = self.exposures.get(product, None)
+                if exposure:
+                    group_exposure.add(KIND_POSITION, exposure.position_long, exposure.position_short)
+                    group_exposure.add(KIND_TRADE, exposure.trade_long, exposure.trade_short)
+                    group_exposure.add(KIND_PENDING, exposure.pending_long, exposure.pending_short)
+
+    def apply(self, product: str, kind: str, long_value: float, short_value: float) -> None:
+        """将敞口变化计入品种、所属分组及账户汇总"""
+        self.get_exposure(product).add(kind, long_value, short_value)
+        self.total.add(kind, long_value, short_value)
+
+        for group in self.product_groups.get(product, ()):
+            self.group_exposures[group].add(kind, long_value, short_value)
+
+        if self.net_callback:
+            self.net_callback(product, long_value - short_value)
+
+    def update_position(self, position: PositionData) -> None:
+        """持仓推送：替换该持仓的贡献，并清除该合约已计入持仓的成交增量"""
+        info: "SymbolInfo" = self.get_symbol_info(position.vt_symbol)
+
+        old: Optional[Tuple[str, float, float]] = self.position_values.get(position.vt_positionid, None)
+        if old:
+            self.apply(old[0], KIND_POSITION, -old[1], -old[2])
+
+        value: float = abs(position.volume) * position.price * info.size
+        if position.direction == Direction.LONG or (position.direction == Direction.NET and position.volume > 0):
+            long_value, short_value = value, 0
+        elif position.direction == Direction.SHORT or (position.direction == Direction.NET and position.volume < 0):
+            long_value, short_value = 0, value
+        else:
+            long_value, short_value = 0, 0
+
+        self.apply(info.product, KIND_POSITION, long_value, short_value)
+        self.position_values[position.vt_positionid] = (info.product, long_value, short_value)
+
+        trade: Optional[Tuple[str, float, float]] = self.trade_values.pop(position.vt_symbol, None)
+        if trade:
+            self.apply(trade[0], KIND_TRADE, -trade[1], -trade[2])
+
+    def update_trade(self, trade: TradeData) -> None:
+        """成交推送：在下一次持仓推送前暂计成交带来的敞口变化"""
+        info: "SymbolInfo" = self.get_symbol_info(trade.vt_symbol)
+
+        value: float = trade.volume * trade.price * info.size
+        long_value: float = 0
+        short_value: float = 0
+
+        if is_open(trade.offset):
+            if trade.direction == Direction.LONG:
+                long_value = value
+            else:
+                short_value = value
+        else:
+            # 平仓减少反方向敞口
+            if trade.direction == Direction.LONG:
+                short_value = -value
+            else:
+                long_value = -value
+
+        self.apply(info.product, KIND_TRADE, long_value, short_value)
+
+        _, old_long, old_short = self.trade_values.get(trade.vt_symbol, (info.product, 0, 0))
+        self.trade_values[trade.vt_symbol] = (info.product, old_long + long_value, old_short + short_value)
+
+    def update_order(self, order: OrderData) -> None:
+        """委托推送：活动开仓委托的未成交部分计入挂单敞口"""
+        old: Optional[Tuple[str, float, float]] = self.order_values.pop(order.vt_orderid, None)
+        if old:
+            self.apply(old[0], KIND_PENDING, -old[1], -old[2])
+
+        if not order.is_active() or not is_open(order.offset):
+            return
+
+        info: "SymbolInfo" = self.get_symbol_info(order.vt_symbol)
+
+        value: float = (order.volume - order.traded) * order.price * info.size
+        if order.direction == Direction.LONG:
+            long_value, short_value = value, 0
+        else:
+            long_value, short_value = 0, value
+
+        self.apply(info.product, KIND_PENDING, long_value, short_value)
+        self.order_values[order.vt_orderid] = (info.product, long_value, short_value)
+
+    def clear(self) -> None:
+        """"""
+        self.exposures.clear()
+        self.total = ProductExposure("")
+        for group, group_exposure in self.group_exposures.items():
+            self.group_exposures[group] = ProductExposure(group)
+
+        self.position_values.clear()
+        self.order_values.clear()
+        self.trade_values.clear()
@@ -1,8 +1,7 @@
-from typing import Dict, Optional
-
-from vnpy.trader.object import OrderRequest, ContractData
+from vnpy.trader.object import OrderRequest
 from vnpy.trader.utility import load_json, save_json
 from vnpy_riskmanager import RiskEngine
+from vnpy_riskmanager.engine import RiskBatch, SymbolInfo, STALE_BALANCE
 
 
 class OrderValueLimit(RiskEngine):
@@ -21,39 +20,50 @@ class OrderValueLimit(RiskEngine):
 
     def check_risk(self, req: OrderRequest, gateway_name: str) -> bool:
         """检查风控"""
-        # 1. 获取当前账户资金
+        # 获取当前账户资金
         account_value = self.get_balance(gateway_name)
-        if not account_value:
-            msg = f"无法获取账户资金[{gateway_name}]，拒绝订单"
-            self.write_log(msg)
-            self.record_order_error(req, msg, gateway_name)
-            return False
-            
-        # 2. 计算当前订单的价值量
-        # 获取合约信息
-        contract: Optional[ContractData] = self.main_engine.get_contract(req.vt_symbol)
-        if not contract:
-            msg = f"找不到合约信息{req.vt_symbol}，拒绝订单"
-            self.write_log(msg)
-            self.record_order_error(req, msg, gateway_name)
-            return False
-            
-        # 使用合约的size属性(币安为1,CTP为真实合约乘数)
-        order_value = req.volume * req.price * contract.size
-            
-        # 3. 计算允许的最大订单价值量
-        # 按照账户资金比例计算，例如:
-        # 如果基准账户100万可下8000，那么5万的账户可下400
-        max_order_value = (account_value / self.base_account_value) * self.base_max_order_value
-        
-        # 4. 检查是否超过限制
-        if order_value > max_order_value:
-            msg = f"订单价值量{order_value:.2f}超过账户限制{max_order_value:.2f}"
-            self.write_log(msg)
-            self.record_order_error(req, msg, gateway_name)
-            return False
-            
-        return True
+        return check_order_value(self, req, gateway_name, account_value)
+
+    def check_batch_order(self, req: OrderRequest, gateway_name: str, batch: RiskBatch) -> bool:
+        """批量检查，账户资金在整批委托间共享"""
+        account_value = batch.get_balance()
+        return check_order_value(self, req, gateway_name, account_value)
+
+
+def check_order_value(engine: RiskEngine, req: OrderRequest, gateway_name: str, account_value: float) -> bool:
+    """
+    按账户资金检查单笔订单价值量，逐笔及批量检查共用。
+
+    插件方法绑定到风控引擎实例上执行，engine为风控引擎。
+    """
+    if not account_value or account_value == STALE_BALANCE:
+        msg = engine.get_balance_msg(account_value, gateway_name)
+        engine.reject_order(req, msg, gateway_name, "OrderValueLimit")
+        return False
+
+    # 计算当前订单的价值量
+    # 获取合约信息
+    info: SymbolInfo = engine.get_symbol_info(req.vt_symbol)
+    if not info.size:
+        msg = f"找不到合约信息{req.vt_symbol}，拒绝订单"
+        engine.reject_order(req, msg, gateway_name, "OrderValueLimit")
+        return False
+
+    # 使用合约的size属性(币安为1,CTP为真实合约乘数)
+    order_value = req.volume * req.price * info.size
+
+    # 计算允许的最大订单价值量
+    # 按照账户资金比例计算，例如:
+    # 如果基准账户100万可下8000，那么5万的账户可下400
+    max_order_value = (account_value / engine.base_account_value) * engine.base_max_order_value
+
+    # 检查是否超过限制
+    if order_value > max_order_value:
+        msg = f"订单价值量{order_value:.2f}超过账户限制{max_order_value:.2f}"
+        engine.reject_order(req, msg, gateway_name, "OrderValueLimit")
+        return False
+
+    return True
 
 
 if __name__ == "__main__":
@@ -1,9 +1,6 @@
-from typing import Optional, List
-
-from vnpy.trader.constant import Direction
-from vnpy.trader.object import OrderRequest, TradeData, OrderData, PositionData
+from vnpy.trader.object import OrderRequest
 from vnpy_riskmanager import RiskEngine
-from vnpy.utils.symbol_info import all_sizes, extract_symbol_pre
+from vnpy_riskmanager.engine import SymbolInfo
 
 class SymbolFrozen(RiskEngine):
     def check_risk(self, req: OrderRequest, gateway_name: str) -> bool:
@@ -60,38 +57,10 @@ class SymbolFrozen(RiskEngine):
         # self.order_flow_count += 1
         # return True
 
-        # SymbolFrozen的check_risk方法：当单品种持仓占用资金超过5%时，限制开仓。
-        # 1.获取当前持仓
-        vt_symbol: str = req.vt_symbol
-        symbol_pre, symbol_num, exchange = extract_symbol_pre(vt_symbol)
-        positions: List[PositionData] = self.get_symbol_positions(vt_symbol)
-        # 2.获取当前持仓占用资金（各条持仓信息的：持仓数量*持仓方向*持仓均价*合约乘数 加总）
-        frozen: float = 0
-        for position in positions:
-            direction = 1 if position.direction == Direction.LONG else -1 if position.direction == Direction.SHORT else 0
-            frozen += position.volume * direction * position.price
-        frozen = abs(frozen * all_sizes[symbol_pre])
-        # 3.获取当前持仓占用资金占总资金比例
-        total: float = self.get_balance()
-        if total == 0:
-            msg = "账户总资金为0，拒绝订单"
-            self.write_log(msg)
-            self.record_order_error(req, msg, gateway_name)
-            return False
-        ratio: float = frozen / total
-        # 4.判断是否超过5%
-        if ratio > 0.05:
-            msg = f"品种{vt_symbol}持仓占用资金{frozen}，超过总资金{total}的5%"
-            self.write_log(msg)
-            self.record_order_error(req, msg, gateway_name)
-            return False
-        else:
-            return True
-        # 5.获取当前委托品种的tick中的价格、开平仓方向
-        tick: TickData = self.main_engine.get_tick(vt_symbol)
-        price: float = tick.last_price
-        direction: Direction = req.direction
-        offset: Offset = req.offset
-        # 6.计算当前委托对该品种持仓占用资金的增减
-        # todo: 注：此处计算方式待定。其他计算方式如，按 volume 的绝对值 计算，不考虑 锁仓的price。
-        # 7.判断如果执行该委托后，持仓占用资金占总资金比例是否超过5%
+        # SymbolFrozen的check_risk方法：当单品种占用资金超过5%时，限制开仓。
+        # 1.获取品种的分品种比例上限，未配置时使用5%
+        info: SymbolInfo = self.get_symbol_info(req.vt_symbol)
+        limit: float = self.product_exposure_limits.get(info.product, 0.05)
+        # 2.由敞口引擎计算委托成交后的品种净敞口（持仓、未推送持仓的成交、活动委托及本笔委托），
+        #   判断占总资金比例是否超过上限，减少敞口的委托始终允许
+        return self.check_exposure_ratio(req, gateway_name, limit, "SymbolFrozen")
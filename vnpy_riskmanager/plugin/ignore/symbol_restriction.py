@@ -22,16 +22,14 @@ class SymbolRestriction(RiskEngine):
         #             代码中控制启动白名单or黑名单模块。
 
         # 2. 判断是否在白名单/黑名单中，如果不在白名单，直接drop掉（或者如果在黑名单，直接drop掉）
-        symbol = req.vt_symbol.rsplit(".", 1)[0]
+        symbol = self.get_symbol_info(req.vt_symbol).symbol
         if self.restrict_by_white_list and symbol not in self.restriction_list:
             msg = f"{symbol}不在白名单中，直接drop掉"
-            self.write_log(msg)
-            self.record_order_error(req, msg, gateway_name)
+            self.reject_order(req, msg, gateway_name, "SymbolRestriction")
             return False
         elif not self.restrict_by_white_list and symbol in self.restriction_list:
             msg = f"{symbol}在黑名单中，直接drop掉"
-            self.write_log(msg)
-            self.record_order_error(req, msg, gateway_name)
+            self.reject_order(req, msg, gateway_name, "SymbolRestriction")
             return False
         return True
 
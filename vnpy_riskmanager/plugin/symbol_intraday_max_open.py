@@ -6,6 +6,7 @@ from vnpy.trader.object import OrderRequest, TradeData
 from vnpy.trader.utility import load_json, save_json
 
 from vnpy_riskmanager import RiskEngine
+from vnpy_riskmanager.engine import RiskBatch, SymbolInfo
 
 
 class SymbolIntradayMaxOpen(RiskEngine):
@@ -15,36 +16,55 @@ class SymbolIntradayMaxOpen(RiskEngine):
 
     def check_risk(self, req: OrderRequest, gateway_name: str) -> bool:
         # SymbolIntradayMaxOpen的check_risk方法：风控模块4：“XX品种当日开仓量超过XX”
-        symbol = req.vt_symbol.rsplit(".", 1)[0].upper()
-        for i, s in enumerate(symbol):
-            if s.isdigit():
-                pre = symbol[:i]
-                break
+        info: SymbolInfo = self.get_symbol_info(req.vt_symbol)
+        symbol = info.symbol.upper()
+        pre = info.product
 
         if pre in self.symbol_max_open and self.symbol_max_open[pre] <= 0:
             msg = f"{pre}当日开仓量已达上限"
-            self.write_log(msg)
-            self.record_order_error(req, msg, gateway_name)
+            self.reject_order(req, msg, gateway_name, "SymbolIntradayMaxOpen")
             return False
 
         if symbol in self.contract_max_open and self.contract_max_open[symbol] <= 0:
             msg = f"{symbol}当日开仓量已达上限"
-            self.write_log(msg)
-            self.record_order_error(req, msg, gateway_name)
+            self.reject_order(req, msg, gateway_name, "SymbolIntradayMaxOpen")
             return False
 
         return True
 
+    def check_batch_order(self, req: OrderRequest, gateway_name: str, batch: RiskBatch) -> bool:
+        # 批量检查：剩余开仓额度需扣除批内已通过委托的开仓量
+        info: SymbolInfo = self.get_symbol_info(req.vt_symbol)
+        symbol = info.symbol.upper()
+        pre = info.product
+
+        if pre in self.symbol_max_open:
+            used = sum(
+                volume for vt_symbol, volume in batch.open_volumes.items()
+                if self.get_symbol_info(vt_symbol).product == pre
+            )
+            if self.symbol_max_open[pre] - used <= 0:
+                msg = f"{pre}当日开仓量已达上限"
+                self.reject_order(req, msg, gateway_name, "SymbolIntradayMaxOpen")
+                return False
+
+        if symbol in self.contract_max_open:
+            used = batch.open_volumes.get(req.vt_symbol, 0)
+            if self.contract_max_open[symbol] - used <= 0:
+                msg = f"{symbol}当日开仓量已达上限"
+                self.reject_order(req, msg, gateway_name, "SymbolIntradayMaxOpen")
+                return False
+
+        return True
+
     def process_trade_event_(self, event: Event) -> None:
         """"""
         trade: TradeData = event.data
         if trade.offset != Offset.OPEN:
             return
-        symbol = trade.symbol.upper()
-        for i, s in enumerate(symbol):
-            if s.isdigit():
-                pre = symbol[:i]
-                break
+        info: SymbolInfo = self.get_symbol_info(trade.vt_symbol)
+        symbol = info.symbol.upper()
+        pre = info.product
         if pre in self.symbol_max_open and self.symbol_max_open[pre] > 0:
             self.symbol_max_open[pre] -= trade.volume
 
@@ -0,0 +1,87 @@
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+
+def generate_bounds() -> List[int]:
+    """生成固定分桶边界（纳秒）：100ns起按1.25倍递增，覆盖至约10秒"""
+    bounds: List[int] = []
+
+    bound: float = 100
+    while bound < 10_000_000_000:
+        bounds.append(int(bound))
+        bound *= 1.25
+
+    return bounds
+
+
+BUCKET_BOUNDS: List[int] = generate_bounds()
+
+
+class LatencyHistogram:
+    """固定分桶延时直方图"""
+
+    def __init__(self) -> None:
+        """"""
+        self.buckets: List[int] = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count: int = 0
+        self.total: int = 0
+        self.max: int = 0
+
+    def record(self, ns: int) -> None:
+        """记录一次耗时（纳秒）"""
+        self.buckets[bisect_left(BUCKET_BOUNDS, ns)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, q: float) -> int:
+        """获取分位数，返回所在分桶的上界（纳秒）"""
+        if not self.count:
+            return 0
+
+        target: float = self.count * q
+        accumulated: int = 0
+
+        for i, n in enumerate(self.buckets):
+            accumulated += n
+            if accumulated >= target:
+                if i < len(BUCKET_BOUNDS):
+                    return min(BUCKET_BOUNDS[i], self.max)
+                return self.max
+
+        return self.max
+
+    def get_stats(self) -> dict:
+        """"""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0,
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+
+class LatencyProfiler:
+    """风控检查延时统计（按检查项名称分别记录）"""
+
+    def __init__(self) -> None:
+        """"""
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+    def record(self, name: str, ns: int) -> None:
+        """"""
+        histogram: Optional[LatencyHistogram] = self.histograms.get(name, None)
+        if not histogram:
+            histogram = LatencyHistogram()
+            self.histograms[name] = histogram
+        histogram.record(ns)
+
+    def get_stats(self) -> Dict[str, dict]:
+        """获取各检查项的p50/p99/max等统计（纳秒）"""
+        return {name: histogram.get_stats() for name, histogram in self.histograms.items()}
+
+    def clear(self) -> None:
+        """"""
+        self.histograms.clear()
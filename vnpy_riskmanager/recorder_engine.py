@@ -1,29 +1,54 @@
 """"""
-import re
+import json
+import random
+import zlib
+from array import array
 import sys, traceback
-from threading import Thread
-from queue import Queue, Empty
-from typing import Any, Dict, List, Optional
-from collections import defaultdict
-from datetime import datetime, time
+from copy import copy
+from dataclasses import fields
+from operator import attrgetter
+from enum import Enum
+from pathlib import Path
+from threading import Condition, Lock, Thread
+from time import monotonic, perf_counter_ns, sleep
+from queue import Queue, Empty, Full
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime, time, timedelta
 from zoneinfo import ZoneInfo
 from vnpy.event import Event, EventEngine
 from vnpy.trader.engine import BaseEngine, MainEngine
 from vnpy.trader.object import BarData, BaseData
 from vnpy.trader.event import EVENT_TIMER#, EVENT_BAR_AGG
 from vnpy.trader.database import get_database, convert_tz
+from vnpy.trader.database import DB_TZ as DATABASE_TZ  # convert_tz转换的目标时区
 from vnpy.trader.constant import Exchange, Interval
 from vnpy.trader.object import BarData, TickData
-from vnpy.trader.utility import save_json, load_json, virtual
+from vnpy.trader.utility import save_json, load_json, virtual, get_file_path, get_folder_path
 from peewee import CharField, DateTimeField, FloatField, Model, IntegerField
 from dataclasses import dataclass
-from peewee import chunked
+from peewee import chunked, fn, InterfaceError, OperationalError
+import numpy as np
+
+from .profiler import LatencyHistogram
+from .symbol import SymbolNormalizer
+from .aggregator import BAR_FIELDS, CHINA_TZ, DEFAULT_DAILY_CLOSE, BarAggregator, aggregate_history, parse_window
+from .spool import SpoolSink, get_closed_segments, load_segment, mark_imported, parse_segment_key, prune_imported
 
 APP_NAME = "DataRecorder"
 EVENT_RECORDER_LOG = "eRecorderLog"
 EVENT_BAR_RECORD = "eBarGenRec"
 EVENT_BAR_AGG = 'eBarGenAggRec'
 EVENT_ORDER_ERROR_RECORD = 'eOrderErrorRec'
+EVENT_RECORDER_METRICS = "eRecorderMetrics"
+
+# 写入队列满时的处理策略
+POLICY_BLOCK = "block"              # 阻塞等待写入线程
+POLICY_DROP_OLDEST = "drop_oldest"  # 丢弃最早的任务
+POLICY_SPILL = "spill"              # 写入本地溢出文件
+
+# 委托错误批量写入每批条数（SQLite单条语句变量数上限为999）
+ORDER_ERROR_CHUNK_SIZE = 50
 
 # 数据库时区
 DB_TZ = ZoneInfo("Asia/Shanghai")
@@ -105,6 +130,652 @@ class OrderErrorData(BaseData):
 # 确保表存在
 database.db.create_tables([AggregatedBarData, AggregatedBarOverview, OrderError], safe=True)
 
+# 聚合K线批量插入的字段顺序
+AGG_BAR_INSERT_FIELDS: list = [
+    AggregatedBarData.symbol,
+    AggregatedBarData.exchange,
+    AggregatedBarData.interval,
+    AggregatedBarData.datetime,
+    AggregatedBarData.volume,
+    AggregatedBarData.turnover,
+    AggregatedBarData.open_interest,
+    AggregatedBarData.open_price,
+    AggregatedBarData.high_price,
+    AggregatedBarData.low_price,
+    AggregatedBarData.close_price,
+]
+
+
+def reconcile_overview() -> int:
+    """
+    离线重建聚合K线汇总数据：按(symbol, exchange, interval)分组统计全表，覆盖写入汇总表。
+
+    需要扫描全表，用于修复汇总数据偏差，不在记录过程中调用。返回汇总数据条数。
+    """
+    query = (
+        AggregatedBarData.select(
+            AggregatedBarData.symbol,
+            AggregatedBarData.exchange,
+            AggregatedBarData.interval,
+            fn.COUNT(AggregatedBarData.id).alias("count"),
+            fn.MIN(AggregatedBarData.datetime).alias("start"),
+            fn.MAX(AggregatedBarData.datetime).alias("end"),
+        )
+        .group_by(AggregatedBarData.symbol, AggregatedBarData.exchange, AggregatedBarData.interval)
+        .dicts()
+    )
+    rows: List[dict] = list(query)
+
+    with database.db.atomic():
+        AggregatedBarOverview.delete().execute()
+        for c in chunked(rows, 50):
+            AggregatedBarOverview.insert_many(c).execute()
+
+    return len(rows)
+
+
+# 可选择写入本地映射文件的事件类型及对应的任务类型
+SPOOL_TASK_TYPES: Dict[str, str] = {
+    EVENT_BAR_RECORD: "bar",
+    EVENT_BAR_AGG: "agg_bar",
+}
+
+# 溢出文件中各任务类型对应的数据类
+TASK_CLASSES: Dict[str, type] = {
+    "bar": BarData,
+    "agg_bar": BarData,
+    "order_error": OrderErrorData,
+}
+
+ENUM_FIELDS: Dict[str, type] = {
+    "exchange": Exchange,
+    "interval": Interval,
+}
+
+
+def to_record(obj: BaseData) -> dict:
+    """将数据对象转换为可JSON序列化的字典"""
+    record: dict = {}
+    for k, v in obj.__dict__.items():
+        if isinstance(v, Enum):
+            v = v.value
+        elif isinstance(v, datetime):
+            v = v.isoformat()
+        record[k] = v
+    return record
+
+
+def from_record(cls: type, record: dict) -> BaseData:
+    """由to_record生成的字典还原数据对象"""
+    kwargs: dict = {}
+    for f in fields(cls):
+        if not f.init or f.name not in record:
+            continue
+
+        v = record[f.name]
+        if f.name in ENUM_FIELDS and v is not None:
+            v = ENUM_FIELDS[f.name](v)
+        elif isinstance(v, str) and f.type in (datetime, "datetime"):
+            v = datetime.fromisoformat(v)
+        kwargs[f.name] = v
+
+    obj: BaseData = cls(**kwargs)
+
+    # 数据类字段以外的附加属性，如窗口K线的interval_value
+    for k, v in record.items():
+        if k not in kwargs and not hasattr(obj, k):
+            setattr(obj, k, v)
+
+    return obj
+
+
+# 按统一时区偏移批量转换时间的最大跨度（秒），时区偏移在该范围内最多变化一次
+TZ_UNIFORM_SPAN: int = 7 * 24 * 3600
+
+# 聚合K线数值字段，与AggregatedBarData同名
+BAR_VALUE_FIELDS: List[str] = [
+    "volume",
+    "turnover",
+    "open_interest",
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+]
+
+get_bar_values: attrgetter = attrgetter(*BAR_VALUE_FIELDS)
+
+
+class BarColumns:
+    """
+    单个(symbol, interval)的列式K线缓存。
+
+    数值字段保存在array("d")列中，追加时只保存K线原始时间的引用，不做时区转换（事件线程中只做追加）；
+    写入时在写入线程中转换为数据库时区，并直接由各列生成元组批量插入，不创建BarData或字典，也不修改原BarData对象。
+    由本地映射文件等离线数据生成时，时间已批量转换为数据库时区（converted为True）。
+    interval_value为写入数据表的周期，窗口K线为周期标签（如5m），默认为interval.value。
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        interval: Interval,
+        gateway_name: str = "",
+        interval_value: str = ""
+    ) -> None:
+        """"""
+        self.symbol: str = symbol
+        self.exchange: Exchange = exchange
+        self.interval: Interval = interval
+        self.interval_value: str = interval_value or interval.value
+        self.gateway_name: str = gateway_name
+
+        self.datetimes: List[datetime] = []
+        self.converted: bool = False
+        self.columns: Dict[str, array] = {name: array("d") for name in BAR_VALUE_FIELDS}
+        self.appends: List[Callable] = [column.append for column in self.columns.values()]
+
+    @classmethod
+    def from_array(cls, symbol: str, exchange: Exchange, interval: Interval, data: np.ndarray) -> "BarColumns":
+        """由本地映射文件读取的结构化数组（时间为UTC微秒）生成"""
+        columns: BarColumns = cls(symbol, exchange, interval)
+        columns.datetimes = convert_timestamps(data["datetime"])
+        columns.converted = True
+        for name, column in columns.columns.items():
+            column.frombytes(data[name].tobytes())
+        return columns
+
+    @classmethod
+    def from_bars(cls, bars: List[BarData]) -> "BarColumns":
+        """"""
+        bar: BarData = bars[0]
+        interval_value: str = getattr(bar, "interval_value", "")
+        columns: BarColumns = cls(bar.symbol, bar.exchange, bar.interval, bar.gateway_name, interval_value)
+        for bar in bars:
+            columns.append(bar)
+        return columns
+
+    def append(self, bar: BarData) -> None:
+        """"""
+        self.datetimes.append(bar.datetime)
+        for append, value in zip(self.appends, get_bar_values(bar)):
+            append(value)
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.datetimes)
+
+    def __getitem__(self, i: int) -> BarData:
+        """还原第i条K线（数据库时区），用于溢出文件等非常规路径"""
+        if self.converted:
+            dt: datetime = self.datetimes[i].replace(tzinfo=DATABASE_TZ)
+        else:
+            dt: datetime = self.datetimes[i].astimezone(DATABASE_TZ)
+
+        bar: BarData = BarData(
+            symbol=self.symbol,
+            exchange=self.exchange,
+            interval=self.interval,
+            datetime=dt,
+            gateway_name=self.gateway_name
+        )
+        for name, column in self.columns.items():
+            setattr(bar, name, column[i])
+
+        if self.interval_value != self.interval.value:
+            bar.interval_value = self.interval_value
+        return bar
+
+    def __iter__(self):
+        """"""
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def nbytes(self) -> int:
+        """各列占用的字节数（估算时间列）"""
+        size: int = sum(column.itemsize * len(column) for column in self.columns.values())
+        return size + len(self.datetimes) * sys.getsizeof(datetime.min)
+
+    def get_datetimes(self) -> List[datetime]:
+        """数据库时区的时间（不含时区信息），在写入线程中调用"""
+        if self.converted:
+            return self.datetimes
+        return [convert_tz(dt) for dt in self.datetimes]
+
+    def get_rows(self, datetimes: Optional[List[datetime]] = None) -> List[tuple]:
+        """生成按AGG_BAR_INSERT_FIELDS排列的插入元组，datetimes为已转换的时间"""
+        if datetimes is None:
+            datetimes = self.get_datetimes()
+
+        n: int = len(self)
+        return list(zip(
+            [self.symbol] * n,
+            [self.exchange.value] * n,
+            [self.interval_value] * n,
+            datetimes,
+            *self.columns.values()
+        ))
+
+
+def convert_timestamps(timestamps: np.ndarray) -> List[datetime]:
+    """
+    UTC微秒时间戳批量转换为数据库时区的时间（不含时区信息，与convert_tz一致）。
+
+    最早与最晚时间的时区偏移相同且跨度不超过TZ_UNIFORM_SPAN时，按统一偏移向量化转换，否则逐条转换。
+    """
+    if not len(timestamps):
+        return []
+
+    start: int = int(timestamps.min())
+    end: int = int(timestamps.max())
+    offset: timedelta = datetime.fromtimestamp(start / 1_000_000, DATABASE_TZ).utcoffset()
+
+    if (
+        end - start > TZ_UNIFORM_SPAN * 1_000_000
+        or datetime.fromtimestamp(end / 1_000_000, DATABASE_TZ).utcoffset() != offset
+    ):
+        return [
+            datetime.fromtimestamp(ts / 1_000_000, DATABASE_TZ).replace(tzinfo=None)
+            for ts in timestamps.tolist()
+        ]
+
+    microseconds: np.ndarray = timestamps.astype(np.int64) + offset // timedelta(microseconds=1)
+    return microseconds.astype("datetime64[us]").tolist()
+
+
+def build_agg_columns(
+    symbol: str,
+    exchange: Exchange,
+    bars: List[BarData],
+    intervals: List[str],
+    daily_close: str = DEFAULT_DAILY_CLOSE
+) -> List[BarColumns]:
+    """将按时间排序的1分钟K线向量化聚合为各周期的列式缓存"""
+    if not bars:
+        return []
+
+    datetimes: np.ndarray = np.array(
+        [bar.datetime.astimezone(CHINA_TZ).replace(tzinfo=None) for bar in bars],
+        dtype="datetime64[m]"
+    )
+    values: Dict[str, np.ndarray] = {
+        name: np.array([getattr(bar, name) for bar in bars], dtype=float) for name in BAR_FIELDS
+    }
+
+    result: List[BarColumns] = []
+    for label in intervals:
+        keys, agg_values = aggregate_history(datetimes, values, label, daily_close)
+
+        window_interval: Interval = parse_window(label)[0]
+        columns: BarColumns = BarColumns(symbol, exchange, window_interval, bars[0].gateway_name, label)
+        columns.datetimes = [
+            convert_tz(dt.replace(tzinfo=CHINA_TZ)) for dt in keys.astype(datetime).tolist()
+        ]
+        columns.converted = True
+        for name, column in columns.columns.items():
+            column.fromlist(agg_values[name].tolist())
+
+        result.append(columns)
+
+    return result
+
+
+# 聚合K线读取结果类型
+OUTPUT_BAR = "bar"          # BarData列表
+OUTPUT_NUMPY = "numpy"      # NumPy列（datetime及各数值字段）
+
+
+class AggBarRange:
+    """单个已缓存的时间范围（数据库时区），各列按时间排序且只读"""
+
+    def __init__(self, start: datetime, end: datetime, datetimes: np.ndarray, columns: Dict[str, np.ndarray]) -> None:
+        """"""
+        self.start: datetime = start
+        self.end: datetime = end
+        self.datetimes: np.ndarray = datetimes
+        self.columns: Dict[str, np.ndarray] = columns
+
+        self.datetimes.flags.writeable = False
+        for column in columns.values():
+            column.flags.writeable = False
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        """"""
+        return self.start <= start and end <= self.end
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        """"""
+        return self.start <= end and start <= self.end
+
+    def slice(self, start: datetime, end: datetime) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """返回[start, end]范围内各列的视图（零拷贝）"""
+        i: int = np.searchsorted(self.datetimes, np.datetime64(start, "us"), side="left")
+        j: int = np.searchsorted(self.datetimes, np.datetime64(end, "us"), side="right")
+        return self.datetimes[i:j], {name: column[i:j] for name, column in self.columns.items()}
+
+
+def query_agg_bars(key: Tuple[str, str, str], start: datetime, end: datetime) -> AggBarRange:
+    """从数据库读取[start, end]范围内的聚合K线"""
+    symbol, exchange, interval = key
+
+    rows: List[tuple] = list(
+        AggregatedBarData.select(AggregatedBarData.datetime, *[getattr(AggregatedBarData, name) for name in BAR_VALUE_FIELDS])
+        .where(
+            (AggregatedBarData.symbol == symbol)
+            & (AggregatedBarData.exchange == exchange)
+            & (AggregatedBarData.interval == interval)
+            & (AggregatedBarData.datetime >= start)
+            & (AggregatedBarData.datetime <= end)
+        )
+        .order_by(AggregatedBarData.datetime)
+        .tuples()
+    )
+
+    if rows:
+        values: List[tuple] = list(zip(*rows))
+    else:
+        values: List[tuple] = [()] * (len(BAR_VALUE_FIELDS) + 1)
+
+    datetimes: np.ndarray = np.array(values[0], dtype="datetime64[us]")
+    columns: Dict[str, np.ndarray] = {
+        name: np.array(column, dtype=float) for name, column in zip(BAR_VALUE_FIELDS, values[1:])
+    }
+    return AggBarRange(start, end, datetimes, columns)
+
+
+def merge_ranges(ranges: List[AggBarRange]) -> AggBarRange:
+    """合并相互重叠的范围，重复的时间点只保留一条"""
+    datetimes: np.ndarray = np.concatenate([r.datetimes for r in ranges])
+
+    index: np.ndarray = np.argsort(datetimes, kind="stable")
+    datetimes = datetimes[index]
+    unique: np.ndarray = np.r_[True, datetimes[1:] != datetimes[:-1]] if len(datetimes) else np.zeros(0, dtype=bool)
+    index = index[unique]
+
+    columns: Dict[str, np.ndarray] = {
+        name: np.concatenate([r.columns[name] for r in ranges])[index] for name in BAR_VALUE_FIELDS
+    }
+
+    return AggBarRange(
+        min(r.start for r in ranges),
+        max(r.end for r in ranges),
+        datetimes[unique],
+        columns
+    )
+
+
+class AggBarCache:
+    """
+    聚合K线读取缓存，按(symbol, exchange, interval)的LRU缓存。
+
+    每个键缓存若干互不重叠的时间范围，查询与已缓存范围重叠时只从数据库读取缺失部分并合并。
+    记录引擎写入时使写入时间范围内的缓存失效；查询期间发生写入时，查询结果不放入缓存。
+    """
+
+    def __init__(self, max_keys: int = 64) -> None:
+        """"""
+        self.max_keys: int = max_keys
+
+        self.ranges: OrderedDict[Tuple[str, str, str], List[AggBarRange]] = OrderedDict()
+        self.versions: Dict[Tuple[str, str, str], int] = defaultdict(int)
+
+        # 读取线程与记录引擎写入线程并发访问
+        self.lock: Lock = Lock()
+
+    def load(self, key: Tuple[str, str, str], start: datetime, end: datetime) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """读取[start, end]范围（数据库时区）的各列"""
+        with self.lock:
+            ranges: List[AggBarRange] = list(self.ranges.get(key, []))
+            version: int = self.versions[key]
+            if key in self.ranges:
+                self.ranges.move_to_end(key)
+
+        overlapped: List[AggBarRange] = [r for r in ranges if r.overlaps(start, end)]
+        for r in overlapped:
+            if r.covers(start, end):
+                return r.slice(start, end)
+
+        # 读取查询范围内未缓存的部分，与重叠的已缓存范围合并
+        new_ranges: List[AggBarRange] = list(overlapped)
+        cursor: datetime = start
+        for r in overlapped:
+            if r.start > cursor:
+                new_ranges.append(query_agg_bars(key, cursor, r.start))
+            cursor = max(cursor, r.end)
+        if cursor < end or not overlapped:
+            new_ranges.append(query_agg_bars(key, cursor, end))
+
+        merged: AggBarRange = merge_ranges(new_ranges)
+
+        with self.lock:
+            if self.versions[key] == version:
+                ranges = [r for r in self.ranges.get(key, []) if r not in overlapped]
+                ranges.append(merged)
+                ranges.sort(key=lambda r: r.start)
+
+                self.ranges[key] = ranges
+                self.ranges.move_to_end(key)
+                while len(self.ranges) > self.max_keys:
+                    self.ranges.popitem(last=False)
+
+        return merged.slice(start, end)
+
+    def invalidate(self, key: Tuple[str, str, str], start: Optional[datetime] = None, end: Optional[datetime] = None) -> None:
+        """使与[start, end]重叠的缓存范围失效，未指定范围时清除该键的全部缓存"""
+        with self.lock:
+            self.versions[key] += 1
+
+            ranges: Optional[List[AggBarRange]] = self.ranges.get(key, None)
+            if not ranges:
+                return
+
+            if start is None or end is None:
+                self.ranges.pop(key)
+            else:
+                self.ranges[key] = [r for r in ranges if not r.overlaps(start, end)]
+
+    def clear(self) -> None:
+        """"""
+        with self.lock:
+            self.ranges.clear()
+            for key in self.versions:
+                self.versions[key] += 1
+
+
+agg_bar_cache: AggBarCache = AggBarCache()
+
+
+def load_agg_bar_data(
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    start: datetime,
+    end: datetime,
+    output: str = OUTPUT_BAR
+):
+    """
+    读取聚合K线，结果按(symbol, exchange, interval)缓存。
+
+    interval可为Interval或窗口标签（如"5m"）。output为OUTPUT_BAR时返回BarData列表，
+    为OUTPUT_NUMPY时返回{"datetime": 数据库时区时间, 各数值字段: float64}的只读NumPy列（缓存视图，不拷贝）。
+    """
+    if isinstance(interval, Interval):
+        interval_value: str = interval.value
+    else:
+        interval_value: str = interval
+
+    key: Tuple[str, str, str] = (symbol, exchange.value, interval_value)
+    datetimes, columns = agg_bar_cache.load(key, convert_tz(start), convert_tz(end))
+
+    if output == OUTPUT_NUMPY:
+        data: Dict[str, np.ndarray] = {"datetime": datetimes}
+        data.update(columns)
+        return data
+
+    if interval_value in Interval._value2member_map_:
+        bar_interval: Interval = Interval(interval_value)
+    else:
+        bar_interval: Interval = parse_window(interval_value)[0]
+    values: List[list] = [column.tolist() for column in columns.values()]
+
+    bars: List[BarData] = []
+    for dt, *bar_values in zip(datetimes.tolist(), *values):
+        bar: BarData = BarData(
+            symbol=symbol,
+            exchange=exchange,
+            datetime=dt.replace(tzinfo=DATABASE_TZ),
+            interval=bar_interval,
+            gateway_name="DB"
+        )
+        for name, value in zip(BAR_VALUE_FIELDS, bar_values):
+            setattr(bar, name, value)
+
+        if interval_value != bar_interval.value:
+            bar.interval_value = interval_value
+        bars.append(bar)
+
+    return bars
+
+
+class SpillFile:
+    """
+    本地溢出文件（追加写入的JSONL，每行一批任务）。
+
+    数据库写入失败的任务暂存于此，恢复后回放。回放时先将文件改名，
+    回放期间新的溢出写入新文件。回放按块读取，每块确认写入后将已回放的字节位置记录到offset文件，
+    回放中断时下次从记录的位置继续。
+    """
+
+    def __init__(self, path: Path) -> None:
+        """"""
+        self.path: Path = path
+        self.replay_path: Path = path.with_suffix(".replay")
+        self.offset_path: Path = path.with_suffix(".offset")
+
+        # 事件线程（队列溢出）与写入线程可能同时追加
+        self.lock: Lock = Lock()
+
+    def exists(self) -> bool:
+        """"""
+        return self.path.exists() or self.replay_path.exists()
+
+    def append(self, task_type: str, items: list) -> None:
+        """"""
+        record: dict = {"type": task_type, "data": [to_record(item) for item in items]}
+        line: str = json.dumps(record, ensure_ascii=False) + "\n"
+
+        with self.lock:
+            with open(self.path, mode="a", encoding="UTF-8") as f:
+                f.write(line)
+
+    def append_line(self, line: str) -> None:
+        """追加一行原始记录"""
+        with self.lock:
+            with open(self.path, mode="a", encoding="UTF-8") as f:
+                f.write(line if line.endswith("\n") else line + "\n")
+
+    def open_replay(self) -> bool:
+        """准备回放文件，上次回放未完成时继续使用，返回是否有待回放的数据"""
+        with self.lock:
+            if self.replay_path.exists():
+                return True
+
+            if not self.path.exists():
+                return False
+
+            # 新的回放文件从头开始
+            self.offset_path.unlink(missing_ok=True)
+            self.path.replace(self.replay_path)
+            return True
+
+    def get_offset(self) -> int:
+        """已确认回放的字节位置"""
+        if not self.offset_path.exists():
+            return 0
+        return int(self.offset_path.read_text() or 0)
+
+    def read(self, offset: int, max_rows: int, dead_letter: Optional["SpillFile"] = None) -> Tuple[List[Tuple[str, list]], int]:
+        """
+        从offset开始读取任务，累计数据达到max_rows条（至少一行）时停止。
+
+        返回任务及下次读取的字节位置，位置不变表示已读完。无法还原的记录原样写入dead_letter。
+        """
+        tasks: List[Tuple[str, list]] = []
+        rows: int = 0
+
+        with open(self.replay_path, mode="rb") as f:
+            f.seek(offset)
+
+            while rows < max_rows:
+                data: bytes = f.readline()
+                if not data:
+                    break
+                offset += len(data)
+                line: str = data.decode("UTF-8", errors="replace")
+
+                # 进程崩溃时最后一行可能不完整，跳过
+                try:
+                    record: dict = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                try:
+                    cls: type = TASK_CLASSES[record["type"]]
+                    items: list = [from_record(cls, d) for d in record["data"]]
+                except Exception:
+                    if dead_letter:
+                        dead_letter.append_line(line)
+                    continue
+
+                tasks.append((record["type"], items))
+                rows += len(items)
+
+        return tasks, offset
+
+    def commit(self, offset: int) -> None:
+        """记录已确认回放的字节位置"""
+        temp_path: Path = self.offset_path.with_suffix(".tmp")
+        temp_path.write_text(str(offset))
+        temp_path.replace(self.offset_path)
+
+    def finish(self) -> None:
+        """回放完成后删除回放文件（先删除位置记录，中断时从头重新回放，重复写入按主键覆盖）"""
+        self.offset_path.unlink(missing_ok=True)
+        self.replay_path.unlink(missing_ok=True)
+
+
+class WriteAck:
+    """回放及导入线程放入的一组任务，由写入线程逐个确认，全部写入数据库后ok为True"""
+
+    def __init__(self, count: int) -> None:
+        """"""
+        self.count: int = count
+        self.ok: bool = True
+        self.condition: Condition = Condition()
+
+    def done(self, ok: bool) -> None:
+        """确认一个任务"""
+        with self.condition:
+            self.ok = self.ok and ok
+            self.count -= 1
+            if self.count <= 0:
+                self.condition.notify_all()
+
+    def fail(self) -> None:
+        """任务被丢弃或处理异常，不再等待其余任务"""
+        with self.condition:
+            self.ok = False
+            self.count = 0
+            self.condition.notify_all()
+
+    def wait(self) -> bool:
+        """等待全部任务确认，返回是否全部写入"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.count <= 0)
+            return self.ok
+
 
 class RecorderEngine(BaseEngine):
     """"""
@@ -114,19 +785,79 @@ class RecorderEngine(BaseEngine):
         """"""
         super().__init__(main_engine, event_engine, APP_NAME)
 
-        self.queue: Queue = Queue()
-        self.thread: Thread = Thread(target=self.run)
+        # 写入队列，元素为(任务类型, 数据, 入队时间, 写入确认)
+        self.queue_maxsize: int = 1000  # 队列最大任务数
+        self.overflow_policy: str = POLICY_SPILL  # 队列满时的处理策略，put_task在事件线程中调用，阻塞需显式配置
+        self.buffer_limit: int = 100_000  # 全部缓存的数据条数上限，超过时立即写入全部缓存
+        self.buffer_count: int = 0
+
+        # 写入线程池，按数据表及代码哈希分区，同一代码的数据始终由同一线程按顺序写入
+        self.writer_count: int = 1  # 写入线程数
+        self.queues: List[Queue] = []
+        self.threads: List[Thread] = []
         self.active: bool = False
+        self.writer_active: bool = False  # 写入线程在回放及导入线程退出后停止
 
+        # 定时写入及按条数、字节数触发的写入，各缓存的定时写入时间可加入随机抖动以错开
         self.timer_count: int = 0
-        self.timer_interval: int = 60
+        self.timer_interval: int = 60  # 定时写入间隔（秒）
+        self.flush_rows: int = 5000  # 单个缓存条数达到该值时立即写入，0表示不启用
+        self.flush_bytes: int = 0  # 单个缓存估算字节数达到该值时立即写入，0表示不启用
+        self.flush_jitter: float = 0  # 定时写入间隔随机抖动比例，如0.2表示±20%
+        self.flush_deadlines: Dict[Tuple[str, str], int] = {}
+        self.row_bytes: Dict[type, int] = {}
+
+        # 写入统计
+        self.metrics_interval: int = 60  # 统计推送间隔（秒）
+        self.metrics_timer: int = 0
+        self.metrics_time: float = monotonic()
+        self.written_count: int = 0
+        self.reported_count: int = 0
+        self.write_rate: float = 0
+        self.dropped_count: int = 0
+        self.spilled_count: int = 0
+        self.dead_count: int = 0
+        self.write_latency: LatencyHistogram = LatencyHistogram()
+        self.metrics_lock: Lock = Lock()
+
+        # 写入失败重试及本地溢出
+        self.retry_count: int = 3  # 连接类错误重试次数
+        self.retry_interval: float = 1  # 首次重试等待（秒），此后每次加倍
+        self.retry_max: float = 30  # 最长重试等待（秒），也是数据库不可用时重新尝试写入的间隔
+        self.db_available: bool = True
+        self.next_attempt: float = 0
+        self.replay_rows: int = 10_000  # 溢出文件每次回放的数据条数
+        self.spill: SpillFile = SpillFile(get_file_path("recorder_spill.jsonl"))
+        self.dead_letter: SpillFile = SpillFile(get_file_path("recorder_dead_letter.jsonl"))  # 数据错误的任务，不再回放
+
+        # 本地映射文件：选中的事件类型直接写入按代码、日期分段的文件，由导入线程写入数据库
+        self.spool_events: List[str] = []  # 写入本地映射文件的事件类型，如["eBarGenAggRec"]
+        self.spool_capacity: int = 4096  # 分段文件初始容量（条）
+        self.spool_import_interval: int = 60  # 导入已关闭分段的间隔（秒）
+        self.spool_retention_days: int = 7  # 已导入分段的保留天数，0表示导入后即删除
+        self.spools: Dict[str, SpoolSink] = {}
+        self.spool_date: Optional[date] = None
+        self.spool_thread: Optional[Thread] = None
+        self.replay_thread: Optional[Thread] = None
+
+        # 多周期聚合：由记录的1分钟K线增量生成窗口K线，写入聚合K线数据表
+        self.agg_intervals: List[str] = []  # 聚合周期，如["5m", "15m", "30m", "1h", "d"]
+        self.agg_session_ends: Optional[List[str]] = None  # 交易时段结束时间，如["10:15", "11:30", "15:00"]
+        self.agg_daily_close: str = DEFAULT_DAILY_CLOSE  # 日线收盘时间
+        self.aggregator: Optional[BarAggregator] = None
 
         self.bars: Dict[str, List[BarData]] = defaultdict(list)
-        self.agg_bars: Dict[str, List[BarData]] = defaultdict(list)
+        self.agg_bars: Dict[str, BarColumns] = {}
         self.order_errors: List[OrderErrorData] = []
         self.database = database
 
-        # self.load_setting()
+        # 聚合K线汇总数据缓存，key为(symbol, exchange, interval)
+        self.overviews: Dict[Tuple[str, str, str], AggregatedBarOverview] = {}
+        self.load_overviews()
+
+        self.load_setting()
+        self.init_spools()
+        self.init_aggregator()
         self.register_event()
         self.start()
         self.put_event()
@@ -142,134 +873,647 @@ class RecorderEngine(BaseEngine):
         """处理委托错误事件"""
         order_error: OrderErrorData = event.data
         self.order_errors.append(order_error)
+        self.check_buffer("order_error", "", self.order_errors)
 
     def process_bar_event(self, event: Event) -> None:
-        self.record_bar(event.data)
+        bar: BarData = event.data
+        self.record_bar(bar)
+
+        if self.aggregator and bar.interval == Interval.MINUTE:
+            self.aggregate_bar(bar)
+
+    def init_aggregator(self) -> None:
+        """"""
+        if self.agg_intervals:
+            self.aggregator = BarAggregator(self.agg_intervals, self.agg_session_ends, self.agg_daily_close)
+
+    def aggregate_bar(self, bar: BarData) -> None:
+        """更新窗口K线，完成的窗口K线进入聚合K线缓存"""
+        symbol: str = self.get_record_symbol(bar.symbol)
+
+        for label, window_bar in self.aggregator.update_bar(bar):
+            key: str = f"{symbol}_{label}"
+
+            columns: Optional[BarColumns] = self.agg_bars.get(key, None)
+            if columns is None:
+                columns = BarColumns(symbol, bar.exchange, window_bar.interval, bar.gateway_name, label)
+                self.agg_bars[key] = columns
+
+            columns.append(window_bar)
+            self.check_buffer("agg_bar", key, columns)
+
+    def backfill_agg_bars(
+        self,
+        symbol: str,
+        exchange: Exchange,
+        start: datetime,
+        end: datetime,
+        intervals: Optional[List[str]] = None
+    ) -> int:
+        """由数据库中的1分钟K线历史向量化重建聚合K线，放入写入队列，返回生成的K线数量"""
+        if intervals is None:
+            intervals = self.agg_intervals
+
+        bars: List[BarData] = self.database.load_bar_data(symbol, exchange, Interval.MINUTE, start, end)
+
+        count: int = 0
+        for columns in build_agg_columns(symbol, exchange, bars, intervals, self.agg_daily_close):
+            self.put_task("agg_bar", columns)
+            count += len(columns)
+
+        return count
 
     def process_bar_agg_event(self, event: Event) -> None:
         """处理聚合K线事件"""
         bar = event.data
-        self.agg_bars[f"{bar.symbol}_{bar.interval.value}"].append(bar)
+
+        spool: Optional[SpoolSink] = self.spools.get("agg_bar", None)
+        if spool:
+            spool.append(bar, convert_tz(bar.datetime).date())
+            return
+
+        key: str = f"{bar.symbol}_{bar.interval.value}"
+
+        columns: Optional[BarColumns] = self.agg_bars.get(key, None)
+        if columns is None:
+            columns = BarColumns(bar.symbol, bar.exchange, bar.interval, bar.gateway_name)
+            self.agg_bars[key] = columns
+
+        columns.append(bar)
+        self.check_buffer("agg_bar", key, columns)
 
     def process_timer_event(self, event: Event) -> None:
         """"""
+        if self.spools:
+            self.check_spool_date()
+
+        self.metrics_timer += 1
+        if self.metrics_timer >= self.metrics_interval:
+            self.metrics_timer = 0
+            self.put_metrics()
+
+        # 写入到达定时写入时间的缓存
         self.timer_count += 1
-        if self.timer_count < self.timer_interval:
-            return
-        self.timer_count = 0
+        for task_type, key in [k for k, deadline in self.flush_deadlines.items() if deadline <= self.timer_count]:
+            self.flush_buffer(task_type, key)
+
+    def check_buffer(self, task_type: str, key: str, buffer: list) -> None:
+        """缓存新增一条数据后，检查是否需要立即写入"""
+        self.buffer_count += 1
+
+        # 缓存的第一条数据决定其定时写入时间
+        if len(buffer) == 1:
+            self.flush_deadlines[(task_type, key)] = self.timer_count + self.get_flush_delay()
+
+        if self.flush_rows and len(buffer) >= self.flush_rows:
+            self.flush_buffer(task_type, key)
+        elif self.flush_bytes and self.get_buffer_bytes(buffer) >= self.flush_bytes:
+            self.flush_buffer(task_type, key)
+        elif self.buffer_count >= self.buffer_limit:
+            self.flush()
+
+    def get_flush_delay(self) -> int:
+        """定时写入间隔（秒），按flush_jitter加入随机抖动"""
+        delay: float = self.timer_interval
+        if self.flush_jitter:
+            delay *= 1 + random.uniform(-self.flush_jitter, self.flush_jitter)
+        return max(round(delay), 1)
+
+    def get_buffer_bytes(self, buffer: Any) -> int:
+        """估算缓存占用的字节数"""
+        if isinstance(buffer, BarColumns):
+            return buffer.nbytes
+        return len(buffer) * self.get_row_bytes(buffer[0])
 
+    def get_row_bytes(self, item: BaseData) -> int:
+        """估算单条数据占用的字节数（按数据类型缓存）"""
+        size: Optional[int] = self.row_bytes.get(type(item), None)
+        if size is None:
+            size = sys.getsizeof(item) + sys.getsizeof(item.__dict__)
+            size += sum(sys.getsizeof(v) for v in item.__dict__.values())
+            self.row_bytes[type(item)] = size
+        return size
+
+    def flush_buffer(self, task_type: str, key: str) -> None:
+        """将单个缓存放入写入队列"""
+        self.flush_deadlines.pop((task_type, key), None)
+
+        if task_type == "order_error":
+            items: list = self.order_errors
+            self.order_errors = []
+        elif task_type == "bar":
+            items: list = self.bars.pop(key, [])
+        else:
+            items: list = self.agg_bars.pop(key, [])
+
+        if items:
+            self.buffer_count -= len(items)
+            self.put_task(task_type, items)
+
+    def flush(self) -> None:
+        """将全部缓存数据放入写入队列"""
         # 处理普通K线
         self.write_log(f"record_bar engine info: {self.bars.keys()}")
-        for bars in self.bars.values():
-            self.queue.put(("bar", bars))
-        self.bars.clear()
+        for key in list(self.bars):
+            self.flush_buffer("bar", key)
 
         # 处理聚合K线
-        for bars in self.agg_bars.values():
-            self.queue.put(("agg_bar", bars))
-        self.agg_bars.clear()
+        for key in list(self.agg_bars):
+            self.flush_buffer("agg_bar", key)
 
-        for error in self.order_errors:
-            self.queue.put(("order_error", error))
-        self.order_errors.clear()
+        self.flush_buffer("order_error", "")
+
+    def put_task(self, task_type: str, items: list, block: bool = False, ack: Optional[WriteAck] = None) -> None:
+        """
+        放入写入队列，队列满时按overflow_policy处理，block为True时总是阻塞等待（回放及导入线程）。
+
+        传入ack的任务写入失败时不写入溢出文件，由ack通知放入任务的线程。
+        """
+        task: tuple = (task_type, items, monotonic(), ack)
+        queue: Queue = self.get_queue(task_type, items)
+
+        if block or self.overflow_policy == POLICY_BLOCK:
+            queue.put(task)
+            return
+
+        try:
+            queue.put_nowait(task)
+            return
+        except Full:
+            pass
+
+        if self.overflow_policy == POLICY_SPILL:
+            self.spill.append(task_type, items)
+            with self.metrics_lock:
+                self.spilled_count += len(items)
+            return
+
+        # 丢弃最早的任务，写入线程可能同时取走任务，循环直到放入成功
+        while True:
+            try:
+                _, dropped, _, dropped_ack = queue.get_nowait()
+                with self.metrics_lock:
+                    self.dropped_count += len(dropped)
+                if dropped_ack:
+                    dropped_ack.fail()
+            except Empty:
+                pass
 
-    def run(self) -> None:
-        """"""
-        while self.active:
             try:
-                task: Any = self.queue.get(timeout=1)
-                task_type, data = task
-
-                if task_type == "bar":
-                    self.write_log(f"record_bar engine info: {data}")
-                    self.database.save_bar_data(data)
-                elif task_type == "agg_bar":
-                    # 读取主键参数
-                    bar: BarData = data[0]
-                    symbol: str = bar.symbol
-                    exchange: Exchange = bar.exchange
-                    interval: Interval = bar.interval
-
-                    # 批量保存聚合K线数据
-                    agg_bars = []
-                    for bar in data:
-                        # 调整时区
-                        bar_datetime = convert_tz(bar.datetime)
-
-                        # 使用__dict__转换数据
-                        d = bar.__dict__
-                        d["exchange"] = d["exchange"].value
-                        d["interval"] = d["interval"].value
-                        d["datetime"] = bar_datetime
-                        
-                        # 移除不需要的字段
-                        d.pop("gateway_name", None)
-                        d.pop("vt_symbol", None)
-                        d.pop("open_interest_value", None)
-                        
-                        agg_bars.append(d)
-
-                    # 批量保存数据
-                    with self.database.db.atomic():
-                        for c in chunked(agg_bars, 50):  # 每50条数据一批
-                            AggregatedBarData.insert_many(c).on_conflict_replace().execute()
-
-                    # 更新汇总数据
-                    overview: AggregatedBarOverview = AggregatedBarOverview.get_or_none(
-                        AggregatedBarOverview.symbol == symbol,
-                        AggregatedBarOverview.exchange == exchange.value,
-                        AggregatedBarOverview.interval == interval.value
-                    )
-
-                    if not overview:
-                        overview = AggregatedBarOverview()
-                        overview.symbol = symbol
-                        overview.exchange = exchange.value
-                        overview.interval = interval.value
-                        overview.start = data[0].datetime
-                        overview.end = data[-1].datetime
-                        overview.count = len(data)
-                    else:                        
-                        overview.start = min(data[0].datetime, overview.start)
-                        overview.end = max(data[-1].datetime, overview.end)
-
-                        s = AggregatedBarData.select().where(
-                            (AggregatedBarData.symbol == symbol)
-                            & (AggregatedBarData.exchange == exchange.value)
-                            & (AggregatedBarData.interval == interval.value)
-                        )
-                        overview.count = s.count()
-
-                    overview.save()
-                elif task_type == "order_error":
-                    error = data
-                    # 使用__dict__转换数据
-                    d = error.__dict__
-                    d["exchange"] = d["exchange"].value
-                    
-                    # 移除不需要的字段
-                    d.pop("gateway_name", None)  # 因为BaseData中有这个字段
-                    d.pop("vt_symbol", None)     # 如果有的话
-                    
-                    OrderError.insert(d).on_conflict_replace().execute()
+                queue.put_nowait(task)
+                return
+            except Full:
+                continue
+
+    def get_queue(self, task_type: str, items: list) -> Queue:
+        """按数据表及代码哈希选择写入分区"""
+        if len(self.queues) == 1:
+            return self.queues[0]
+
+        if task_type == "order_error":
+            key: str = task_type
+        elif isinstance(items, BarColumns):
+            key: str = f"{task_type}.{items.symbol}"
+        else:
+            key: str = f"{task_type}.{items[0].symbol}"
 
+        return self.queues[zlib.crc32(key.encode()) % len(self.queues)]
+
+    def get_metrics(self) -> dict:
+        """获取写入队列及数据库写入统计，延时单位为纳秒"""
+        now: float = monotonic()
+        oldest_age: float = 0
+        for queue in self.queues:
+            try:
+                oldest_age = max(oldest_age, now - queue.queue[0][2])
+            except IndexError:
+                pass
+
+        return {
+            "queue_depth": sum(queue.qsize() for queue in self.queues),  # 队列任务数
+            "partition_depths": [queue.qsize() for queue in self.queues],  # 各分区队列任务数
+            "queue_maxsize": self.queue_maxsize,  # 每个分区的队列最大任务数
+            "oldest_age": oldest_age,  # 队列中最早任务的等待时间（秒）
+            "buffered": self.buffer_count,  # 等待写入的缓存数据条数
+            "written": self.written_count,  # 累计写入数据条数
+            "write_rate": self.write_rate,  # 上一统计周期每秒写入数据条数
+            "write_latency": self.write_latency.get_stats(),  # 上一统计周期单批写入耗时
+            "dropped": self.dropped_count,  # 累计丢弃数据条数
+            "spilled": self.spilled_count,  # 累计溢出数据条数
+            "dead": self.dead_count,  # 累计写入死信文件的数据条数
+            "db_available": self.db_available,
+        }
+
+    def put_metrics(self) -> None:
+        """计算写入速率并推送统计事件"""
+        now: float = monotonic()
+        written: int = self.written_count
+        self.write_rate = (written - self.reported_count) / (now - self.metrics_time)
+        self.reported_count = written
+        self.metrics_time = now
+
+        self.event_engine.put(Event(EVENT_RECORDER_METRICS, self.get_metrics()))
+
+        with self.metrics_lock:
+            self.write_latency = LatencyHistogram()
+
+    def run(self, queue: Queue) -> None:
+        """写入线程"""
+        # 停止后继续写入队列中剩余的任务
+        while self.writer_active or not queue.empty():
+            try:
+                task: Any = queue.get(timeout=1)
             except Empty:
                 continue
+
+            # 取出队列中已有的全部任务，按类型合并写入
+            tasks: List[Any] = [task]
+            while True:
+                try:
+                    tasks.append(queue.get_nowait())
+                except Empty:
+                    break
+
+            self.process_batch(tasks)
+
+    def run_replay(self) -> None:
+        """回放线程：启动时回放上次运行遗留的溢出数据，此后定时检查"""
+        self.check_spill(force=True)
+
+        while self.active:
+            sleep(1)
+            self.check_spill()
+
+    def process_batch(self, tasks: List[Any]) -> None:
+        """处理一次取出的任务，异常时通知等待中的回放及导入线程"""
+        try:
+            self.process_tasks(tasks)
+        except Exception:
+            msg = f"record_engine 处理任务异常\n{traceback.format_exc()}"
+            self.write_log(msg)
+
+            for task in tasks:
+                if task[3]:
+                    task[3].fail()
+
+    def process_tasks(self, tasks: List[Any]) -> None:
+        """按类型及写入确认分组处理任务，同组内保持入队顺序"""
+        groups: Dict[Tuple[str, Optional[WriteAck]], list] = defaultdict(list)
+        for task_type, data, _, ack in tasks:
+            groups[(task_type, ack)].append(data)
+
+        for (task_type, ack), group in groups.items():
+            # 回放及导入的任务写入失败时由其来源重新放入，不写入溢出文件
+            spill: bool = ack is None
+
+            if task_type == "order_error":
+                errors: List[OrderErrorData] = [error for data in group for error in data]
+                ok: bool = self.write_task(task_type, errors, spill)
+            else:
+                ok: bool = True
+                for data in group:
+                    if task_type == "bar":
+                        self.write_log(f"record_bar engine info: {data}")
+                    ok = self.write_task(task_type, data, spill) and ok
+
+            if ack:
+                for _ in group:
+                    ack.done(ok)
+
+    def save_task(self, task_type: str, items: list) -> None:
+        """"""
+        if task_type == "bar":
+            # 数据库接口会修改传入的BarData，传入副本以便失败后重试或溢出
+            self.database.save_bar_data([copy(bar) for bar in items])
+        elif task_type == "agg_bar":
+            # 溢出文件回放等路径传入的是BarData列表
+            if not isinstance(items, BarColumns):
+                items = BarColumns.from_bars(items)
+            self.save_agg_bars(items)
+        elif task_type == "order_error":
+            self.save_order_errors(items)
+
+    def write_task(self, task_type: str, items: list, spill: bool = True) -> bool:
+        """
+        写入一批任务，连接类错误按指数退避重试，仍失败时写入溢出文件。
+
+        数据库不可用期间，直到下次尝试时间前的任务直接溢出，不再逐批重试。
+        其他错误（数据错误等）重试无效，任务写入死信文件，不影响数据库可用状态。
+        返回False表示因数据库连接失败未写入。
+        """
+        if not self.db_available and monotonic() < self.next_attempt:
+            if spill:
+                self.spill.append(task_type, items)
+                with self.metrics_lock:
+                    self.spilled_count += len(items)
+            return False
+
+        delay: float = self.retry_interval
+        for n in range(self.retry_count + 1):
+            try:
+                start: int = perf_counter_ns()
+                self.save_task(task_type, items)
+                elapsed: int = perf_counter_ns() - start
+
+                with self.metrics_lock:
+                    self.write_latency.record(elapsed)
+                    self.written_count += len(items)
+
+                self.db_available = True
+                return True
+            except (OperationalError, InterfaceError) as e:
+                error: Exception = e
+                if n == self.retry_count or not self.active:
+                    break
+                sleep(delay)
+                delay = min(delay * 2, self.retry_max)
+            except Exception as e:
+                # 逐条写入，只将出错的数据写入死信文件
+                if len(items) > 1:
+                    self.write_log(f"record_engine 写入{task_type}数据错误：{e}，改为逐条写入")
+                    results: List[bool] = [self.write_task(task_type, [item], spill) for item in items]
+                    return all(results)
+
+                self.dead_letter.append(task_type, items)
+                with self.metrics_lock:
+                    self.dead_count += len(items)
+                self.write_log(f"record_engine 写入{task_type}数据错误：{e}，已写入死信文件{self.dead_letter.path}")
+                return True
+
+        self.db_available = False
+        self.next_attempt = monotonic() + self.retry_max
+
+        msg = f"record_engine 写入{task_type}数据失败：{error}"
+        if spill:
+            self.spill.append(task_type, items)
+            with self.metrics_lock:
+                self.spilled_count += len(items)
+            msg += f"，已写入溢出文件{self.spill.path}"
+        self.write_log(msg)
+
+        return False
+
+    def check_spill(self, force: bool = False) -> None:
+        """数据库可用或到达重新尝试时间时回放溢出数据"""
+        if not self.spill.exists():
+            return
+
+        if force or self.db_available or monotonic() >= self.next_attempt:
+            try:
+                self.replay_spill()
+            except Exception:
+                msg = f"record_engine 回放溢出数据异常\n{traceback.format_exc()}"
+                self.write_log(msg)
+
+    def replay_spill(self) -> None:
+        """
+        回放溢出文件：按replay_rows分块读取，任务放入所属代码的写入分区，与实时数据由同一写入线程按顺序写入。
+
+        每块全部写入后记录回放位置；写入失败时停止回放，下次从记录的位置继续。
+        """
+        if not self.spill.open_replay():
+            return
+
+        offset: int = self.spill.get_offset()
+        self.write_log(f"record_engine 开始回放溢出数据，起始位置{offset}")
+
+        while self.active:
+            tasks, next_offset = self.spill.read(offset, self.replay_rows, self.dead_letter)
+            if next_offset == offset:
+                self.spill.finish()
+                self.write_log("record_engine 溢出数据回放完成")
+                return
+
+            ack: WriteAck = WriteAck(len(tasks))
+            for task_type, items in tasks:
+                self.put_task(task_type, items, block=True, ack=ack)
+
+            if not ack.wait():
+                self.write_log(f"record_engine 溢出数据写入失败，停止回放，已回放至位置{offset}")
+                return
+
+            offset = next_offset
+            self.spill.commit(offset)
+
+    def save_agg_bars(self, data: BarColumns) -> None:
+        """保存聚合K线并更新汇总数据"""
+        # 读取主键参数
+        symbol: str = data.symbol
+        exchange: Exchange = data.exchange
+        interval: str = data.interval_value
+
+        # 统计批内新增的K线数量（写入前判断，替换已有数据不计入）
+        key: Tuple[str, str, str] = (symbol, exchange.value, interval)
+        datetimes: List[datetime] = data.get_datetimes()
+        dts: set = set(datetimes)
+        new_count: int = len(dts) - self.count_existing_agg_bars(key, dts)
+
+        # 由各列直接生成元组批量保存
+        with self.database.db.atomic():
+            for c in chunked(data.get_rows(datetimes), 50):  # 每50条数据一批
+                AggregatedBarData.insert_many(c, fields=AGG_BAR_INSERT_FIELDS).on_conflict_replace().execute()
+
+        # 更新汇总数据（内存缓存）
+        start: datetime = min(dts)
+        end: datetime = max(dts)
+
+        overview: Optional[AggregatedBarOverview] = self.overviews.get(key, None)
+        if not overview:
+            overview = AggregatedBarOverview()
+            overview.symbol = symbol
+            overview.exchange = exchange.value
+            overview.interval = interval
+            overview.start = start
+            overview.end = end
+            overview.count = new_count
+            self.overviews[key] = overview
+        else:
+            overview.start = min(start, overview.start)
+            overview.end = max(end, overview.end)
+            overview.count += new_count
+
+        overview.save()
+
+        # 新写入的时间范围内的读取缓存失效
+        agg_bar_cache.invalidate(key, start, end)
+
+    def count_existing_agg_bars(self, key: Tuple[str, str, str], dts: set) -> int:
+        """查询批内时间点中数据库已存在的K线数量，只查询汇总时间范围内的时间点"""
+        overview: Optional[AggregatedBarOverview] = self.overviews.get(key, None)
+        if not overview:
+            return 0
+
+        # 追加写入时全部晚于已有数据，无需查询
+        candidates: List[datetime] = [dt for dt in dts if overview.start <= dt <= overview.end]
+        if not candidates:
+            return 0
+
+        symbol, exchange, interval = key
+        count: int = 0
+
+        for c in chunked(candidates, 500):
+            count += AggregatedBarData.select().where(
+                (AggregatedBarData.symbol == symbol)
+                & (AggregatedBarData.exchange == exchange)
+                & (AggregatedBarData.interval == interval)
+                & (AggregatedBarData.datetime.in_(c))
+            ).count()
+
+        return count
+
+    def load_overviews(self) -> None:
+        """启动时载入聚合K线汇总数据缓存"""
+        self.overviews.clear()
+
+        for overview in AggregatedBarOverview.select():
+            key: Tuple[str, str, str] = (overview.symbol, overview.exchange, overview.interval)
+            self.overviews[key] = overview
+
+    def reconcile_overview(self) -> int:
+        """由聚合K线数据表重建汇总数据，并重新载入缓存"""
+        count: int = reconcile_overview()
+        self.load_overviews()
+        return count
+
+    def save_order_errors(self, errors: List[OrderErrorData]) -> None:
+        """批量保存委托错误，在一个事务中分批写入"""
+        rows: List[dict] = []
+        for error in errors:
+            # 复制__dict__转换数据，不修改原对象
+            d = dict(error.__dict__)
+            d["exchange"] = d["exchange"].value
+
+            # 移除不需要的字段
+            d.pop("gateway_name", None)  # 因为BaseData中有这个字段
+            d.pop("vt_symbol", None)     # 如果有的话
+
+            rows.append(d)
+
+        with self.database.db.atomic():
+            for c in chunked(rows, ORDER_ERROR_CHUNK_SIZE):
+                OrderError.insert_many(c).on_conflict_replace().execute()
+
+    def init_spools(self) -> None:
+        """创建选中事件类型的本地映射文件写入器，并关闭上次运行遗留的分段"""
+        for event_type in self.spool_events:
+            task_type: str = SPOOL_TASK_TYPES[event_type]
+
+            spool: SpoolSink = SpoolSink(get_folder_path("recorder_spool").joinpath(task_type), self.spool_capacity)
+            spool.recover()
+            self.spools[task_type] = spool
+
+    def check_spool_date(self) -> None:
+        """跨日时关闭前一日的分段，交由导入线程写入数据库"""
+        today: date = datetime.now(DATABASE_TZ).date()
+        if today == self.spool_date:
+            return
+        self.spool_date = today
+
+        for spool in self.spools.values():
+            spool.seal_expired(today)
+
+    def run_spool_import(self) -> None:
+        """导入线程：定时将已关闭的分段放入所属代码的写入分区"""
+        count: int = self.spool_import_interval
+
+        while self.active:
+            if count < self.spool_import_interval:
+                count += 1
+                sleep(1)
+                continue
+            count = 0
+
+            for task_type, spool in self.spools.items():
+                self.import_spool(task_type, spool)
+
+    def import_spool(self, task_type: str, spool: SpoolSink) -> None:
+        """导入已关闭的分段，写入失败时停止，下次重新导入未完成的分段"""
+        for path in get_closed_segments(spool.root):
+            if not self.active:
+                return
+
+            try:
+                if not self.import_segment(task_type, path):
+                    self.write_log(f"record_engine 导入分段{path}失败，稍后重试")
+                    return
             except Exception:
-                self.active = False
-                msg = f"record_engine 触发异常已停止\n{traceback.format_exc()}"
+                msg = f"record_engine 导入分段{path}异常\n{traceback.format_exc()}"
                 self.write_log(msg)
 
+        before: date = datetime.now(DATABASE_TZ).date() - timedelta(days=self.spool_retention_days)
+        prune_imported(spool.root, before)
+
+    def import_segment(self, task_type: str, path: Path) -> bool:
+        """放入所属代码的写入分区，全部写入数据库后将分段标记为已导入，返回是否写入"""
+        data: np.ndarray = load_segment(path)
+        if len(data):
+            symbol, exchange, interval = parse_segment_key(path.parent.name)
+            columns: BarColumns = BarColumns.from_array(symbol, exchange, interval, data)
+
+            if task_type == "bar":
+                items: list = list(columns)
+            else:
+                items: list = columns
+
+            ack: WriteAck = WriteAck(1)
+            self.put_task(task_type, items, block=True, ack=ack)
+            if not ack.wait():
+                return False
+
+        mark_imported(path)
+        return True
+
     def start(self) -> None:
-        """"""
+        """按writer_count创建分区队列及写入线程"""
         self.active = True
-        self.thread.start()
+        self.writer_active = True
+
+        count: int = max(self.writer_count, 1)
+        self.queues = [Queue(maxsize=self.queue_maxsize) for _ in range(count)]
+        self.threads = [
+            Thread(target=self.run, args=(queue,), name=f"RecorderWriter{i}")
+            for i, queue in enumerate(self.queues)
+        ]
+
+        for thread in self.threads:
+            thread.start()
+
+        self.replay_thread = Thread(target=self.run_replay, name="RecorderReplay")
+        self.replay_thread.start()
+
+        if self.spools:
+            self.spool_thread = Thread(target=self.run_spool_import, name="RecorderSpoolImport")
+            self.spool_thread.start()
 
     def close(self) -> None:
-        """"""
+        """写入全部缓存及队列中的数据后停止"""
+        self.flush()
+
         self.active = False
-        if self.thread.is_alive():
-            self.thread.join()
+
+        # 回放及导入线程等待写入线程确认当前任务后退出
+        for thread in (self.replay_thread, self.spool_thread):
+            if thread and thread.is_alive():
+                thread.join()
+
+        self.writer_active = False
+
+        for thread in self.threads:
+            if thread.is_alive():
+                thread.join()
+
+        # 写入线程退出后放入的任务
+        for queue in self.queues:
+            tasks: List[Any] = []
+            while not queue.empty():
+                tasks.append(queue.get_nowait())
+
+            if tasks:
+                self.process_batch(tasks)
+
+        # 关闭正在写入的分段，下次启动时导入
+        for spool in self.spools.values():
+            spool.seal_all()
 
     def write_log(self, msg: str) -> None:
         """"""
@@ -280,17 +1524,82 @@ class RecorderEngine(BaseEngine):
         pass
 
     def load_setting(self) -> None:
-        """"""
-        pass
+        """从配置文件读取写入相关参数，未配置的参数使用默认值"""
+        setting: dict = load_json(self.setting_filename)
+
+        self.timer_interval = setting.get("timer_interval", self.timer_interval)
+        self.flush_rows = setting.get("flush_rows", self.flush_rows)
+        self.flush_bytes = setting.get("flush_bytes", self.flush_bytes)
+        self.flush_jitter = setting.get("flush_jitter", self.flush_jitter)
+        self.buffer_limit = setting.get("buffer_limit", self.buffer_limit)
+        self.queue_maxsize = setting.get("queue_maxsize", self.queue_maxsize)
+        self.overflow_policy = setting.get("overflow_policy", self.overflow_policy)
+        self.writer_count = setting.get("writer_count", self.writer_count)
+        self.retry_count = setting.get("retry_count", self.retry_count)
+        self.retry_interval = setting.get("retry_interval", self.retry_interval)
+        self.retry_max = setting.get("retry_max", self.retry_max)
+        self.replay_rows = setting.get("replay_rows", self.replay_rows)
+        self.metrics_interval = setting.get("metrics_interval", self.metrics_interval)
+        self.spool_events = setting.get("spool_events", self.spool_events)
+        self.spool_capacity = setting.get("spool_capacity", self.spool_capacity)
+        self.spool_import_interval = setting.get("spool_import_interval", self.spool_import_interval)
+        self.spool_retention_days = setting.get("spool_retention_days", self.spool_retention_days)
+        self.agg_intervals = setting.get("agg_intervals", self.agg_intervals)
+        self.agg_session_ends = setting.get("agg_session_ends", self.agg_session_ends)
+        self.agg_daily_close = setting.get("agg_daily_close", self.agg_daily_close)
+
+    @virtual
+    def get_record_symbol(self, symbol: str) -> str:
+        """记录到数据库的合约代码"""
+        return symbol
 
     @virtual
     def record_bar(self, bar: BarData) -> None:
         """"""
+        spool: Optional[SpoolSink] = self.spools.get("bar", None)
+        if spool:
+            spool.append(bar, convert_tz(bar.datetime).date())
+            return
+
         self.bars[bar.vt_symbol].append(bar)
+        self.check_buffer("bar", bar.vt_symbol, self.bars[bar.vt_symbol])
 
 
 class RecorderEngineCtp(RecorderEngine):
-    def record_bar(self, bar: BarData) -> None:
+    """按规则将K线合约代码转换为连续合约代码记录"""
+
+    # 主力合约表文件的检查间隔（秒）
+    main_ticker_interval: int = 60
+
+    def load_setting(self) -> None:
         """"""
-        bar.symbol = re.sub(r"""(\D*)(\d+)(.*)""", r"\g<1>888\g<3>", bar.symbol)
+        super().load_setting()
+
+        setting: dict = load_json(self.setting_filename)
+        self.normalizer: SymbolNormalizer = SymbolNormalizer.from_setting(setting)
+        self.main_ticker_timer: int = 0
+
+    def process_timer_event(self, event: Event) -> None:
+        """"""
+        super().process_timer_event(event)
+
+        self.main_ticker_timer += 1
+        if self.main_ticker_timer >= self.main_ticker_interval:
+            self.main_ticker_timer = 0
+
+            if self.normalizer.check_main_tickers():
+                self.write_log(f"record_engine 主力合约表已更新：{self.normalizer.main_tickers}")
+
+    def get_record_symbol(self, symbol: str) -> str:
+        """"""
+        return self.normalizer.normalize(symbol)
+
+    def record_bar(self, bar: BarData) -> None:
+        """转换后的代码不同时记录副本，不修改推送的BarData"""
+        symbol: str = self.normalizer.normalize(bar.symbol)
+        if symbol != bar.symbol:
+            bar = copy(bar)
+            bar.symbol = symbol
+            bar.vt_symbol = f"{symbol}.{bar.exchange.value}"
+
         super().record_bar(bar)
@@ -0,0 +1,261 @@
+import mmap
+import struct
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.object import BarData
+
+
+# 文件头：8字节标识 + 8字节记录数，记录区从第64字节开始
+MAGIC: bytes = b"VNSPOOL1"
+HEADER_SIZE: int = 64
+
+# 定长K线记录，时间为UTC微秒时间戳
+SPOOL_DTYPE: np.dtype = np.dtype([
+    ("datetime", "<i8"),
+    ("volume", "<f8"),
+    ("turnover", "<f8"),
+    ("open_interest", "<f8"),
+    ("open_price", "<f8"),
+    ("high_price", "<f8"),
+    ("low_price", "<f8"),
+    ("close_price", "<f8"),
+])
+
+RECORD_STRUCT: struct.Struct = struct.Struct("<q7d")
+
+# 分段文件状态
+SUFFIX_OPEN: str = ".open"          # 正在写入
+SUFFIX_CLOSED: str = ".seg"         # 已关闭，等待导入数据库
+SUFFIX_IMPORTED: str = ".imp"       # 已导入数据库
+
+
+def get_segment_key(symbol: str, exchange: Exchange, interval: Interval) -> str:
+    """分段目录名"""
+    return f"{symbol}.{exchange.value}.{interval.value}"
+
+
+def parse_segment_key(key: str) -> Tuple[str, Exchange, Interval]:
+    """由分段目录名解析代码、交易所及周期"""
+    symbol, exchange, interval = key.rsplit(".", 2)
+    return symbol, Exchange(exchange), Interval(interval)
+
+
+def read_count(path: Path) -> int:
+    """读取分段文件头中的记录数"""
+    with open(path, "rb") as f:
+        header: bytes = f.read(16)
+
+    if header[:8] != MAGIC:
+        raise ValueError(f"不是有效的分段文件：{path}")
+    return struct.unpack_from("<Q", header, 8)[0]
+
+
+def read_segment(path: Path) -> np.ndarray:
+    """以内存映射方式只读打开分段文件，返回零拷贝的结构化数组"""
+    count: int = read_count(path)
+    if not count:
+        return np.zeros(0, dtype=SPOOL_DTYPE)
+    return np.memmap(path, dtype=SPOOL_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+def load_segment(path: Path) -> np.ndarray:
+    """读取分段文件到内存（拷贝），读取后不占用文件"""
+    count: int = read_count(path)
+    return np.fromfile(path, dtype=SPOOL_DTYPE, count=count, offset=HEADER_SIZE)
+
+
+def read_spool(
+    root: Path,
+    symbol: str,
+    exchange: Exchange,
+    interval: Interval,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+) -> List[np.ndarray]:
+    """按日期顺序零拷贝读取某代码的全部分段（含正在写入的分段）"""
+    folder: Path = root.joinpath(get_segment_key(symbol, exchange, interval))
+    if not folder.exists():
+        return []
+
+    arrays: List[np.ndarray] = []
+    for path in sorted(folder.iterdir(), key=get_segment_order):
+        segment_date: date = get_segment_date(path)
+        if (start and segment_date < start) or (end and segment_date > end):
+            continue
+        arrays.append(read_segment(path))
+
+    return arrays
+
+
+def get_segment_date(path: Path) -> date:
+    """分段文件名为{YYYYMMDD}-{序号}{状态后缀}"""
+    return datetime.strptime(path.name[:8], "%Y%m%d").date()
+
+
+def get_segment_order(path: Path) -> Tuple[str, int]:
+    """"""
+    name, seq = path.name.split(".")[0].split("-")
+    return name, int(seq)
+
+
+def get_closed_segments(root: Path) -> List[Path]:
+    """获取已关闭、等待导入的分段文件"""
+    if not root.exists():
+        return []
+    return sorted(root.glob(f"*/*{SUFFIX_CLOSED}"), key=lambda path: (path.parent.name, get_segment_order(path)))
+
+
+def mark_imported(path: Path) -> None:
+    """"""
+    path.replace(path.with_suffix(SUFFIX_IMPORTED))
+
+
+def prune_imported(root: Path, before: date) -> int:
+    """删除日期早于before的已导入分段，返回删除的文件数"""
+    if not root.exists():
+        return 0
+
+    count: int = 0
+    for path in root.glob(f"*/*{SUFFIX_IMPORTED}"):
+        if get_segment_date(path) < before:
+            path.unlink(missing_ok=True)
+            count += 1
+    return count
+
+
+class SpoolSegment:
+    """单个内存映射分段文件，容量不足时按倍数扩展"""
+
+    def __init__(self, path: Path, segment_date: date, capacity: int) -> None:
+        """"""
+        self.path: Path = path
+        self.date: date = segment_date
+        self.count: int = 0
+        self.capacity: int = capacity
+
+        self.file = open(path, "w+b")
+        self.file.truncate(HEADER_SIZE + capacity * SPOOL_DTYPE.itemsize)
+        self.mm: mmap.mmap = mmap.mmap(self.file.fileno(), 0)
+
+        self.mm[:8] = MAGIC
+        struct.pack_into("<Q", self.mm, 8, 0)
+
+    def append(self, bar: BarData) -> None:
+        """追加一条记录，先写记录再更新文件头中的记录数"""
+        if self.count == self.capacity:
+            self.grow()
+
+        RECORD_STRUCT.pack_into(
+            self.mm,
+            HEADER_SIZE + self.count * SPOOL_DTYPE.itemsize,
+            int(bar.datetime.timestamp() * 1_000_000),
+            bar.volume,
+            bar.turnover,
+            bar.open_interest,
+            bar.open_price,
+            bar.high_price,
+            bar.low_price,
+            bar.close_price
+        )
+
+        self.count += 1
+        struct.pack_into("<Q", self.mm, 8, self.count)
+
+    def grow(self) -> None:
+        """"""
+        self.mm.flush()
+        self.mm.close()
+
+        self.capacity *= 2
+        self.file.truncate(HEADER_SIZE + self.capacity * SPOOL_DTYPE.itemsize)
+        self.mm = mmap.mmap(self.file.fileno(), 0)
+
+    def close(self) -> Path:
+        """关闭分段：截断未使用的容量并改为已关闭状态，返回新的文件路径"""
+        self.mm.flush()
+        self.mm.close()
+
+        self.file.truncate(HEADER_SIZE + self.count * SPOOL_DTYPE.itemsize)
+        self.file.close()
+
+        closed_path: Path = self.path.with_suffix(SUFFIX_CLOSED)
+        self.path.replace(closed_path)
+        return closed_path
+
+
+def seal_file(path: Path) -> Path:
+    """关闭上次运行遗留的正在写入的分段文件"""
+    count: int = read_count(path)
+    with open(path, "r+b") as f:
+        f.truncate(HEADER_SIZE + count * SPOOL_DTYPE.itemsize)
+
+    closed_path: Path = path.with_suffix(SUFFIX_CLOSED)
+    path.replace(closed_path)
+    return closed_path
+
+
+class SpoolSink:
+    """
+    K线本地映射文件写入器。
+
+    每个代码（含交易所、周期）每天一个分段文件，记录为定长二进制，
+    写入只涉及内存映射，不等待数据库。跨日或关闭时分段转为已关闭状态，由导入线程写入数据库。
+    """
+
+    def __init__(self, root: Path, capacity: int = 4096) -> None:
+        """"""
+        self.root: Path = root
+        self.capacity: int = capacity
+        self.segments: Dict[str, SpoolSegment] = {}
+
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def recover(self) -> None:
+        """关闭上次运行遗留的正在写入的分段"""
+        for path in self.root.glob(f"*/*{SUFFIX_OPEN}"):
+            seal_file(path)
+
+    def append(self, bar: BarData, bar_date: date) -> None:
+        """追加一条K线，bar_date为其所属的分段日期"""
+        key: str = get_segment_key(bar.symbol, bar.exchange, bar.interval)
+
+        segment: Optional[SpoolSegment] = self.segments.get(key, None)
+        if segment and segment.date != bar_date:
+            segment.close()
+            segment = None
+
+        if not segment:
+            segment = self.new_segment(key, bar_date)
+            self.segments[key] = segment
+
+        segment.append(bar)
+
+    def new_segment(self, key: str, segment_date: date) -> SpoolSegment:
+        """"""
+        folder: Path = self.root.joinpath(key)
+        folder.mkdir(exist_ok=True)
+
+        prefix: str = segment_date.strftime("%Y%m%d")
+        # 已导入的分段可能已按保留天数删除，序号取现有最大序号加1
+        seq: int = max((get_segment_order(path)[1] + 1 for path in folder.glob(f"{prefix}-*")), default=0)
+        path: Path = folder.joinpath(f"{prefix}-{seq}{SUFFIX_OPEN}")
+
+        return SpoolSegment(path, segment_date, self.capacity)
+
+    def seal_expired(self, today: date) -> None:
+        """关闭日期早于today的分段"""
+        for key, segment in list(self.segments.items()):
+            if segment.date < today:
+                segment.close()
+                self.segments.pop(key)
+
+    def seal_all(self) -> None:
+        """"""
+        for segment in self.segments.values():
+            segment.close()
+        self.segments.clear()
@@ -0,0 +1,116 @@
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from vnpy.trader.utility import load_json, get_file_path
+
+
+# 默认规则：合约月份替换为888，如rb2410 -> rb888
+DEFAULT_RULES: List[Tuple[str, str]] = [
+    (r"(\D*)(\d+)(.*)", r"\g<1>888\g<3>")
+]
+
+PRODUCT_PATTERN: Pattern = re.compile(r"[a-zA-Z]+")
+
+
+def get_symbol_product(symbol: str) -> str:
+    """合约代码开头的字母部分，与main_ticker.json的品种键一致（保留大小写）"""
+    match = PRODUCT_PATTERN.match(symbol)
+    if match:
+        return match.group()
+    return ""
+
+
+class SymbolNormalizer:
+    """
+    合约代码规范化，将交易合约代码转换为数据库中记录的代码，结果按代码缓存。
+
+    依次检查：
+    1. 主力合约表（如main_ticker.json）：配置后只有表中的主力合约转换为连续合约代码，其余合约保持原代码
+    2. 品种连续合约别名：如{"rb": "rb888"}
+    3. 正则规则：按顺序使用第一个匹配的规则替换
+    """
+
+    def __init__(
+        self,
+        rules: Optional[List[Tuple[str, str]]] = None,
+        aliases: Optional[Dict[str, str]] = None,
+        main_ticker_file: str = ""
+    ) -> None:
+        """"""
+        if rules is None:
+            rules = DEFAULT_RULES
+
+        self.rules: List[Tuple[Pattern, str]] = [(re.compile(pattern), repl) for pattern, repl in rules]
+        self.aliases: Dict[str, str] = aliases or {}
+
+        self.main_ticker_file: str = main_ticker_file
+        self.main_ticker_mtime: float = 0
+        self.main_tickers: Optional[Dict[str, str]] = None
+
+        self.cache: Dict[str, str] = {}
+
+        if main_ticker_file:
+            self.load_main_tickers()
+
+    @classmethod
+    def from_setting(cls, setting: dict) -> "SymbolNormalizer":
+        """由数据记录配置（symbol_rules、symbol_aliases、main_ticker_file）创建"""
+        return cls(
+            setting.get("symbol_rules", DEFAULT_RULES),
+            setting.get("symbol_aliases", {}),
+            setting.get("main_ticker_file", "")
+        )
+
+    def normalize(self, symbol: str) -> str:
+        """"""
+        result: Optional[str] = self.cache.get(symbol, None)
+        if result is None:
+            result = self.convert(symbol)
+            self.cache[symbol] = result
+        return result
+
+    def convert(self, symbol: str) -> str:
+        """"""
+        product: str = get_symbol_product(symbol)
+
+        # 主力合约表中保存的是vt_symbol（如rb2410.SHFE），比较时去掉交易所后缀
+        if self.main_tickers is not None:
+            main_ticker: str = self.main_tickers.get(product, "")
+            if main_ticker.partition(".")[0] != symbol.partition(".")[0]:
+                return symbol
+
+        alias: Optional[str] = self.aliases.get(product, None)
+        if alias:
+            return alias
+
+        for pattern, repl in self.rules:
+            result, n = pattern.subn(repl, symbol, count=1)
+            if n:
+                return result
+
+        return symbol
+
+    def set_main_tickers(self, main_tickers: Optional[Dict[str, str]]) -> None:
+        """更新主力合约表（如换月后），清空缓存"""
+        self.main_tickers = main_tickers
+        self.cache.clear()
+
+    def load_main_tickers(self) -> None:
+        """"""
+        path: Path = get_file_path(self.main_ticker_file)
+        self.main_ticker_mtime = path.stat().st_mtime if path.exists() else 0
+        self.set_main_tickers(load_json(self.main_ticker_file))
+
+    def check_main_tickers(self) -> bool:
+        """主力合约表文件修改后重新读取，返回是否更新"""
+        if not self.main_ticker_file:
+            return False
+
+        path: Path = get_file_path(self.main_ticker_file)
+        mtime: float = path.stat().st_mtime if path.exists() else 0
+        if mtime == self.main_ticker_mtime:
+            return False
+
+        self.load_main_tickers()
+        return True
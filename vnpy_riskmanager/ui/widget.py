@@ -2,7 +2,20 @@ from vnpy.event import EventEngine
 from vnpy.trader.engine import MainEngine
 from vnpy.trader.ui import QtWidgets, QtCore
 
-from ..engine import APP_NAME, RiskEngine
+from ..engine import (
+    APP_NAME,
+    FLOW_MODE_COUNTER,
+    FLOW_MODE_WINDOW,
+    FLOW_MODE_BUCKET,
+    RiskEngine
+)
+
+
+FLOW_MODE_NAMES: dict = {
+    FLOW_MODE_COUNTER: "定时清空计数",
+    FLOW_MODE_WINDOW: "滑动窗口",
+    FLOW_MODE_BUCKET: "令牌桶",
+}
 
 
 class RiskManager(QtWidgets.QDialog):
@@ -28,6 +41,11 @@ class RiskManager(QtWidgets.QDialog):
 
         self.flow_limit_spin: RiskManagerSpinBox = RiskManagerSpinBox()
         self.flow_clear_spin: RiskManagerSpinBox = RiskManagerSpinBox()
+        self.flow_mode_combo: QtWidgets.QComboBox = QtWidgets.QComboBox()
+        for mode, name in FLOW_MODE_NAMES.items():
+            self.flow_mode_combo.addItem(name, mode)
+        self.flow_window_spin: RiskManagerSpinBox = RiskManagerSpinBox()
+        self.flow_burst_spin: RiskManagerSpinBox = RiskManagerSpinBox()
         self.size_limit_spin: RiskManagerSpinBox = RiskManagerSpinBox()
         self.trade_limit_spin: RiskManagerSpinBox = RiskManagerSpinBox()
         self.active_limit_spin: RiskManagerSpinBox = RiskManagerSpinBox()
@@ -41,6 +59,9 @@ class RiskManager(QtWidgets.QDialog):
         form.addRow("风控运行状态", self.active_combo)
         form.addRow("委托流控上限（笔）", self.flow_limit_spin)
         form.addRow("委托流控清空（秒）", self.flow_clear_spin)
+        form.addRow("委托流控模式", self.flow_mode_combo)
+        form.addRow("委托流控窗口（毫秒）", self.flow_window_spin)
+        form.addRow("委托流控突发（笔）", self.flow_burst_spin)
         form.addRow("单笔委托上限（数量）", self.size_limit_spin)
         form.addRow("总成交上限（笔）", self.trade_limit_spin)
         form.addRow("活动委托上限（笔）", self.active_limit_spin)
@@ -65,6 +86,9 @@ class RiskManager(QtWidgets.QDialog):
             "active": active,
             "order_flow_limit": self.flow_limit_spin.value(),
             "order_flow_clear": self.flow_clear_spin.value(),
+            "order_flow_mode": self.flow_mode_combo.currentData(),
+            "order_flow_window": self.flow_window_spin.value(),
+            "order_flow_burst": self.flow_burst_spin.value(),
             "order_size_limit": self.size_limit_spin.value(),
             "trade_limit": self.trade_limit_spin.value(),
             "active_order_limit": self.active_limit_spin.value(),
@@ -86,6 +110,9 @@ class RiskManager(QtWidgets.QDialog):
 
         self.flow_limit_spin.setValue(setting["order_flow_limit"])
         self.flow_clear_spin.setValue(setting["order_flow_clear"])
+        self.flow_mode_combo.setCurrentIndex(self.flow_mode_combo.findData(setting["order_flow_mode"]))
+        self.flow_window_spin.setValue(setting["order_flow_window"])
+        self.flow_burst_spin.setValue(setting["order_flow_burst"])
         self.size_limit_spin.setValue(setting["order_size_limit"])
         self.trade_limit_spin.setValue(setting["trade_limit"])
         self.active_limit_spin.setValue(setting["active_order_limit"])
@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta
+from statistics import NormalDist
+from threading import Thread
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from vnpy.trader.constant import Exchange, Interval
+from vnpy.trader.database import BaseDatabase, get_database
+from vnpy.trader.object import BarData
+
+if TYPE_CHECKING:
+    from .exposure import ProductExposure
+
+
+def estimate_covariance(closes: Dict[str, Dict[datetime, float]], window: int) -> Tuple[List[str], np.ndarray]:
+    """由各品种收盘价估计对数收益率协方差矩阵，只使用所有品种共有的时间点"""
+    # 数据过少的品种会大幅缩减共有时间点，不纳入估计
+    longest: int = max((len(data) for data in closes.values()), default=0)
+    min_count: int = max(min(longest, window + 1) // 2, 3)
+
+    products: List[str] = [product for product, data in closes.items() if len(data) >= min_count]
+    if not products:
+        return [], np.zeros((0, 0))
+
+    dts: set = set(closes[products[0]])
+    for product in products[1:]:
+        dts &= set(closes[product])
+
+    # 取最近window+1个时间点，得到window个收益率
+    common: List[datetime] = sorted(dts)[-(window + 1):]
+    if len(common) < 3:
+        return [], np.zeros((0, 0))
+
+    prices: np.ndarray = np.array([[closes[product][dt] for product in products] for dt in common])
+    returns: np.ndarray = np.diff(np.log(prices), axis=0)
+    cov: np.ndarray = np.atleast_2d(np.cov(returns, rowvar=False))
+
+    return products, cov
+
+
+class VarModel:
+    """
+    参数法组合VaR模型。
+
+    各品种净敞口（名义价值）保存为与协方差矩阵对齐的向量x，同时维护w=Σx及q=x'Σx，
+    敞口变化时以秩1更新维护w和q，委托检查只需O(1)计算q+2dw_i+d²Σ_ii。
+    协方差矩阵由后台线程从数据库K线估计，估计完成后在事件线程中替换。
+    """
+
+    def __init__(self) -> None:
+        """"""
+        self.products: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.cov: np.ndarray = np.zeros((0, 0))
+
+        self.x: np.ndarray = np.zeros(0)
+        self.w: np.ndarray = np.zeros(0)
+        self.q: float = 0
+
+        self.z: float = NormalDist().inv_cdf(0.99)
+        self.horizon: int = 1
+
+        self.thread: Optional[Thread] = None
+        self.pending: Optional[Tuple[List[str], np.ndarray]] = None
+        self.error: str = ""
+
+    def is_ready(self) -> bool:
+        """"""
+        return bool(self.products)
+
+    def set_parameters(self, confidence: float, horizon: int) -> None:
+        """设置置信度及持有期（K线周期数）"""
+        self.z = NormalDist().inv_cdf(confidence)
+        self.horizon = max(horizon, 1)
+
+    def to_var(self, q: float) -> float:
+        """由组合方差计算VaR"""
+        if q <= 0:
+            return 0
+        return self.z * float(np.sqrt(q * self.horizon))
+
+    def get_var(self) -> float:
+        """当前组合VaR"""
+        return self.to_var(self.q)
+
+    def get_var_after(self, deltas: Dict[str, float]) -> float:
+        """各品种净敞口分别变化deltas后的组合VaR，未纳入协方差矩阵的品种忽略"""
+        q: float = self.q
+        items: List[Tuple[int, float]] = [
+            (self.index[product], delta) for product, delta in deltas.items() if product in self.index
+        ]
+
+        for i, d in items:
+            q += 2 * d * self.w[i]
+            for j, e in items:
+                q += d * e * self.cov[i, j]
+
+        return self.to_var(q)
+
+    def update(self, product: str, delta: float) -> None:
+        """品种净敞口变化，秩1更新w和q"""
+        i: Optional[int] = self.index.get(product, None)
+        if i is None or not delta:
+            return
+
+        self.q += 2 * delta * self.w[i] + delta * delta * self.cov[i, i]
+        self.x[i] += delta
+        self.w += delta * self.cov[:, i]
+
+    def load_exposures(self, exposures: Dict[str, "ProductExposure"]) -> None:
+        """由敞口引擎的品种汇总重新计算x、w、q"""
+        self.x = np.zeros(len(self.products))
+        for product, exposure in exposures.items():
+            i: Optional[int] = self.index.get(product, None)
+            if i is not None:
+                self.x[i] = exposure.net
+
+        self.w = self.cov @ self.x
+        self.q = float(self.x @ self.w)
+
+    def set_covariance(
+        self,
+        products: List[str],
+        cov: np.ndarray,
+        exposures: Dict[str, "ProductExposure"]
+    ) -> None:
+        """"""
+        self.products = products
+        self.index = {product: i for i, product in enumerate(products)}
+        self.cov = cov
+        self.load_exposures(exposures)
+
+    def install_pending(self, exposures: Dict[str, "ProductExposure"]) -> bool:
+        """在事件线程中替换后台线程估计完成的协方差矩阵"""
+        pending: Optional[Tuple[List[str], np.ndarray]] = self.pending
+        if not pending:
+            return False
+
+        self.pending = None
+        self.set_covariance(pending[0], pending[1], exposures)
+        return True
+
+    def start_estimate(
+        self,
+        symbols: Dict[str, Tuple[str, Exchange]],
+        interval: Interval,
+        days: int,
+        window: int
+    ) -> bool:
+        """启动后台线程估计协方差矩阵，上一次估计尚未完成时跳过"""
+        if self.thread and self.thread.is_alive():
+            return False
+
+        self.thread = Thread(target=self.run_estimate, args=(symbols, interval, days, window), daemon=True)
+        self.thread.start()
+        return True
+
+    def run_estimate(
+        self,
+        symbols: Dict[str, Tuple[str, Exchange]],
+        interval: Interval,
+        days: int,
+        window: int
+    ) -> None:
+        """从数据库读取各品种K线并估计协方差矩阵"""
+        try:
+            database: BaseDatabase = get_database()
+            end: datetime = datetime.now()
+            start: datetime = end - timedelta(days=days)
+
+            closes: Dict[str, Dict[datetime, float]] = {}
+            for product, (symbol, exchange) in symbols.items():
+                bars: List[BarData] = database.load_bar_data(symbol, exchange, interval, start, end)
+                closes[product] = {bar.datetime: bar.close_price for bar in bars if bar.close_price > 0}
+
+            self.pending = estimate_covariance(closes, window)
+            self.error = ""
+        except Exception as e:
+            self.error = str(e)